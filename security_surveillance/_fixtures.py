@@ -0,0 +1,238 @@
+"""
+Shared helpers for the test scripts
+
+Set TEST_VERBOSE=1 to see the detailed progress output that vprint()
+suppresses by default.
+"""
+import functools
+import os
+import queue
+import threading
+from contextlib import contextmanager
+import cv2
+import numpy as np
+
+VERBOSE = os.getenv('TEST_VERBOSE', '0') == '1'
+
+# Distance from the top of the head to the person anchor point (person_y)
+_HEAD_TOP = 120
+
+
+def build_person_sprite(with_limbs=True):
+    """
+    Rasterize the test person silhouette once
+    
+    Args:
+        with_limbs: Include arms and legs (False = head and body only)
+    
+    Returns:
+        (sprite, mask) where sprite is (H, W, 3) uint8 and mask is (H, W) bool
+    """
+    half_w = 90 if with_limbs else 50
+    bottom = 160 if with_limbs else 80
+    height, width = _HEAD_TOP + bottom + 1, 2 * half_w + 1
+    
+    # Anchor (person_x, person_y) in sprite coordinates
+    px, py = half_w, _HEAD_TOP
+    
+    shapes = [
+        ('circle', (px, py - 80), 40, (220, 180, 140)),                   # Head
+        ('rect', (px - 50, py - 40), (px + 50, py + 80), (180, 150, 120)),  # Body
+    ]
+    if with_limbs:
+        shapes += [
+            ('rect', (px - 90, py - 20), (px - 50, py + 40), (180, 150, 120)),  # Arms
+            ('rect', (px + 50, py - 20), (px + 90, py + 40), (180, 150, 120)),
+            ('rect', (px - 40, py + 80), (px - 10, py + 160), (160, 130, 100)),  # Legs
+            ('rect', (px + 10, py + 80), (px + 40, py + 160), (160, 130, 100)),
+        ]
+    
+    return rasterize_sprite(shapes, height, width)
+
+
+def rasterize_sprite(shapes, height, width):
+    """
+    Draw a list of filled shapes into a sprite and its coverage mask
+    
+    Args:
+        shapes: ('circle', center, radius, color) or
+                ('rect', top_left, bottom_right, color) tuples, drawn in order
+        height, width: Sprite size in pixels
+    
+    Returns:
+        (sprite, mask) where sprite is (H, W, 3) uint8 and mask is (H, W) bool
+    """
+    sprite = np.zeros((height, width, 3), dtype=np.uint8)
+    mask = np.zeros((height, width), dtype=np.uint8)
+    
+    for kind, a, b, color in shapes:
+        if kind == 'circle':
+            cv2.circle(sprite, a, b, color, -1)
+            cv2.circle(mask, a, b, 255, -1)
+        else:
+            cv2.rectangle(sprite, a, b, color, -1)
+            cv2.rectangle(mask, a, b, 255, -1)
+    
+    return sprite, mask.astype(bool)
+
+
+PERSON_SPRITE, PERSON_MASK = build_person_sprite()
+TORSO_SPRITE, TORSO_MASK = build_person_sprite(with_limbs=False)
+
+
+def draw_person(img, person_x, person_y, with_limbs=True):
+    """
+    Composite the prebuilt person sprite onto a frame (in place)
+    
+    Args:
+        img: BGR frame to draw on
+        person_x, person_y: Person anchor (body center-top reference point)
+        with_limbs: Use the full silhouette (True) or head and body only
+    
+    Returns:
+        The same frame, for chaining
+    """
+    if with_limbs:
+        sprite, mask = PERSON_SPRITE, PERSON_MASK
+    else:
+        sprite, mask = TORSO_SPRITE, TORSO_MASK
+    
+    h, w = mask.shape
+    x0 = person_x - w // 2
+    y0 = person_y - _HEAD_TOP
+    
+    # Clip the sprite to the frame bounds
+    sx0, sy0 = max(0, -x0), max(0, -y0)
+    sx1 = min(w, img.shape[1] - x0)
+    sy1 = min(h, img.shape[0] - y0)
+    if sx0 >= sx1 or sy0 >= sy1:
+        return img
+    
+    roi = img[y0 + sy0:y0 + sy1, x0 + sx0:x0 + sx1]
+    np.copyto(roi, sprite[sy0:sy1, sx0:sx1], where=mask[sy0:sy1, sx0:sx1, None])
+    
+    return img
+
+
+def cached_frame(builder):
+    """
+    Memoize a deterministic frame builder on its arguments
+    
+    Cached frames are shared between callers, so they are returned
+    read-only; copy one before drawing on it.
+    """
+    @functools.lru_cache(maxsize=64)
+    @functools.wraps(builder)
+    def wrapper(*args, **kwargs):
+        frame = builder(*args, **kwargs)
+        frame.flags.writeable = False
+        return frame
+    
+    return wrapper
+
+
+@contextmanager
+def opencv_threads(n=None, opencl=None):
+    """
+    Temporarily change OpenCV's thread count (and optionally OpenCL)
+    
+    Test frames are small, so tests that only draw and filter them use
+    opencv_threads(1, opencl=False): the worker pool costs more than it
+    saves and oversubscribes the CPU when test modules run in parallel.
+    Heavy paths (e.g. video encode) can ask for more threads instead.
+    Works as a context manager or a decorator; settings are restored on exit.
+    
+    Args:
+        n: Thread count (None = one per CPU)
+        opencl: Enable/disable OpenCL (None = leave unchanged)
+    """
+    previous = cv2.getNumThreads()
+    previous_opencl = cv2.ocl.useOpenCL()
+    cv2.setNumThreads(n if n is not None else (os.cpu_count() or 1))
+    if opencl is not None:
+        cv2.ocl.setUseOpenCL(opencl)
+    try:
+        yield
+    finally:
+        cv2.setNumThreads(previous)
+        cv2.ocl.setUseOpenCL(previous_opencl)
+
+
+def vprint(*args, **kwargs):
+    """print() that only writes when TEST_VERBOSE=1"""
+    if VERBOSE:
+        print(*args, **kwargs)
+
+
+class ImageWriter:
+    """
+    Save images on a background thread so disk writes stay out of timed loops
+    
+    Use as a context manager; leaving the block flushes pending writes.
+    put() encodes the image right away (format from the file extension),
+    so the caller is free to draw on or reuse the array afterwards.
+    A failed write doesn't stop the thread; close() re-raises the first one.
+    """
+    
+    def __init__(self, maxsize=8):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="ImageWriter", daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        for path, data in iter(self._queue.get, None):
+            try:
+                with open(path, 'wb') as f:
+                    f.write(data)
+            except Exception as e:
+                # Keep draining so put() never blocks on a dead writer
+                if self._error is None:
+                    self._error = e
+    
+    def put(self, path, img, params=None):
+        """
+        Encode an image and queue it for writing (blocks only if the queue is full)
+        
+        Args:
+            path: Output file path; its extension picks the encoder
+            img: Image to save
+            params: Optional cv2.imencode parameters (e.g. JPEG quality)
+        """
+        ok, buf = cv2.imencode(os.path.splitext(path)[1], img, params or [])
+        if not ok:
+            raise ValueError(f"Could not encode image for {path}")
+        self._queue.put((path, buf.tobytes()))
+    
+    def close(self):
+        """Write everything still queued, stop the thread, re-raise the first write error"""
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Clock:
+    """
+    Manually advanced clock for the time_fn hooks on the modules
+    
+    Calling the clock returns the current time; advance() moves it forward,
+    so test loops can step simulated time instead of sleeping.
+    """
+    
+    def __init__(self, start=0.0):
+        self.now = start
+    
+    def __call__(self):
+        return self.now
+    
+    def advance(self, dt):
+        """Move the clock forward by dt seconds"""
+        self.now += dt
+        return self.now
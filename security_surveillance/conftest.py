@@ -0,0 +1,11 @@
+"""
+pytest configuration for the test scripts
+
+Puts this directory on sys.path so the tests can import main, modules.*
+and _fixtures however pytest is invoked. Running a test file directly
+(python test_x.py) already gets this from the script's own directory.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
@@ -86,8 +86,7 @@ def test_model_inference():
         import cv2
         
         # Create 640x640 test image
-        test_img = np.zeros((640, 640, 3), dtype=np.uint8)
-        test_img[:] = (100, 100, 100)  # Gray background
+        test_img = np.full((640, 640, 3), (100, 100, 100), dtype=np.uint8)  # Gray background
         
         # Draw a person-like shape
         cv2.ellipse(test_img, (320, 200), (50, 70), 0, 0, 360, (200, 150, 100), -1)  # Head
@@ -437,6 +437,7 @@ def main():
         print("🔄 Switched to TFLite model")
     
     system.start()
+    system.database.close()
 
 
 if __name__ == "__main__":
@@ -95,11 +95,8 @@ def run_dashboard(mode="security"):
     )
 
 
-def main():
-    """Main entry point"""
-    global current_mode
-    
-    # Parse command-line arguments
+def build_parser():
+    """Build the command-line argument parser"""
     parser = argparse.ArgumentParser(
         description='Edge AI Unified System - Security & Health Monitoring'
     )
@@ -115,6 +112,15 @@ def main():
         action='store_true',
         help='Use TFLite model for health mode (faster, recommended for Pi)'
     )
+    return parser
+
+
+def main():
+    """Main entry point"""
+    global current_mode
+    
+    # Parse command-line arguments
+    parser = build_parser()
     args = parser.parse_args()
     
     current_mode = args.mode
@@ -134,6 +140,7 @@ def main():
     
     print()
     
+    system_thread = None
     try:
         # Start appropriate system in separate thread
         if current_mode == "security":
@@ -167,6 +174,14 @@ def main():
             surveillance_system.stop()
         if health_system:
             health_system.stop()
+        # The system thread still runs its own stop(), which uses the database
+        if system_thread:
+            system_thread.join(timeout=5.0)
+        # Owner-only close: the dashboard is gone, release the connections
+        if surveillance_system:
+            surveillance_system.database.close()
+        if health_system:
+            health_system.database.close()
         print("✅ System stopped")
 
 
@@ -6,7 +6,10 @@ import sys
 import yaml
 import time
 import signal
+import queue
+import threading
 import cv2
+import numpy as np
 from datetime import datetime
 
 # Import all modules
@@ -50,6 +53,15 @@ class SurveillanceSystem:
         # Initialize all components
         self._init_components()
         
+        # Write-behind queue for detection events (keeps SQLite commits
+        # off the frame loop)
+        self._write_q = queue.Queue(maxsize=1024)
+        self._write_lock = threading.Lock()
+        self._write_thread = threading.Thread(
+            target=self._db_writer_loop, daemon=True, name="DetectionWriter"
+        )
+        self._write_thread.start()
+        
         # Set up signal handlers (only if in main thread)
         try:
             signal.signal(signal.SIGINT, self._signal_handler)
@@ -216,6 +228,9 @@ class SurveillanceSystem:
         det_config = self.config['detection']
         frame_skip = det_config.get('frame_skip', 2)
         
+        # Grayscale buffer shared by tamper and motion detection
+        gray_buf = None
+        
         while self.running:
             # Performance tracking
             
@@ -232,14 +247,19 @@ class SurveillanceSystem:
             if self.recorder:
                 self.recorder.add_frame(frame)
             
+            # Convert to grayscale once per frame (reallocate only on size change)
+            if gray_buf is None or gray_buf.shape != frame.shape[:2]:
+                gray_buf = np.empty(frame.shape[:2], dtype=np.uint8)
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray_buf)
+            
             # Always update tamper baseline
             if self.tamper_detector and self.frame_count <= 30:
-                self.tamper_detector.update_baseline(frame)
+                self.tamper_detector.update_baseline(frame, gray=gray)
             
             # Check for tampering
             tamper_result = None
             if self.tamper_detector:
-                tamper_result = self.tamper_detector.check_tampering(frame)
+                tamper_result = self.tamper_detector.check_tampering(frame, gray=gray)
                 if tamper_result.get('tamper_detected'):
                     self._handle_tamper(tamper_result)
             
@@ -248,7 +268,7 @@ class SurveillanceSystem:
                 continue
             
             # Motion detection
-            has_motion, motion_areas = self.motion_detector.detect(frame)
+            has_motion, motion_areas = self.motion_detector.detect(frame, gray=gray)
             
             # Person detection (only if motion detected)
             if has_motion:
@@ -296,13 +316,17 @@ class SurveillanceSystem:
                 continue
             
             for detection in zone_dets:
-                # Log to database
-                event_id = self.database.log_detection(
-                    zone_name=zone_name,
-                    confidence=detection['confidence'],
-                    bbox=detection['bbox'],
-                    metadata={'frame': self.frame_count}
-                )
+                # Queue for the background writer
+                event = {
+                    'timestamp': datetime.now().isoformat(),
+                    'zone_name': zone_name,
+                    'confidence': detection['confidence'],
+                    'bbox': detection['bbox'],
+                    'metadata': {'frame': self.frame_count}
+                }
+                if not self._queue_detection(event):
+                    # Writer is behind or stopped - log directly so no events are lost
+                    self.database.log_detections([event])
         
         # Process zone detections and trigger alerts
         alerts_triggered = self.alert_manager.process_zone_detections(zone_detections)
@@ -366,6 +390,72 @@ class SurveillanceSystem:
                 zones=all_zones
             )
     
+    def _queue_detection(self, event):
+        """
+        Hand a detection event to the background writer
+        
+        Returns:
+            False if the writer is stopped or its queue is full
+        """
+        with self._write_lock:
+            if self._write_thread is None or not self._write_thread.is_alive():
+                return False
+            try:
+                self._write_q.put_nowait(event)
+            except queue.Full:
+                return False
+        return True
+    
+    def _db_writer_loop(self, max_batch=64):
+        """Drain queued detection events and write them in batches"""
+        while True:
+            event = self._write_q.get()
+            if event is None:
+                break
+            
+            # Grab whatever else is already queued, without blocking
+            batch = [event]
+            stop = False
+            while len(batch) < max_batch:
+                try:
+                    event = self._write_q.get_nowait()
+                except queue.Empty:
+                    break
+                if event is None:
+                    stop = True
+                    break
+                batch.append(event)
+            
+            try:
+                self.database.log_detections(batch)
+            except Exception as e:
+                print(f"❌ Failed to write {len(batch)} detection event(s): {e}")
+            
+            if stop:
+                break
+    
+    def _flush_detections(self):
+        """Stop the background writer after it drains the queue"""
+        with self._write_lock:
+            writer, self._write_thread = self._write_thread, None
+            if writer is not None and writer.is_alive():
+                self._write_q.put(None)
+        
+        if writer is not None:
+            writer.join()
+        
+        # Write anything the writer did not get to (e.g. if it died)
+        leftover = []
+        while True:
+            try:
+                event = self._write_q.get_nowait()
+            except queue.Empty:
+                break
+            if event is not None:
+                leftover.append(event)
+        if leftover:
+            self.database.log_detections(leftover)
+    
     def _handle_tamper(self, tamper_result):
         """Handle tampering detection"""
         if tamper_result.get('covered'):
@@ -441,6 +531,9 @@ class SurveillanceSystem:
         if self.behavior_learner:
             self.behavior_learner.save()
         
+        # Write any queued detection events
+        self._flush_detections()
+        
         # Final statistics
         print("\n📊 Final Statistics:")
         totals = self.database.get_total_events()
@@ -461,6 +554,7 @@ def main():
     # Create and start surveillance system
     system = SurveillanceSystem(config_path='config/config.yaml')
     system.start()
+    system.database.close()
 
 
 if __name__ == "__main__":
@@ -4,10 +4,84 @@ SQLite database for logging detection events
 """
 import sqlite3
 import os
+import threading
+from functools import lru_cache, wraps
 from datetime import datetime
 import json
 
 
+INSERT_DETECTION_SQL = '''
+    INSERT INTO detection_events
+    (timestamp, event_type, zone_name, confidence,
+     bbox_x1, bbox_y1, bbox_x2, bbox_y2, recording_file, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_SYSTEM_EVENT_SQL = '''
+    INSERT INTO system_events
+    (timestamp, event_type, severity, message, metadata)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+UPSERT_DAILY_STATS_SQL = '''
+    INSERT INTO daily_stats
+    (date, total_detections, total_alerts, total_recordings, zones_triggered)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(date) DO UPDATE SET
+        total_detections = total_detections + ?,
+        total_alerts = total_alerts + ?,
+        total_recordings = total_recordings + ?,
+        zones_triggered = ?,
+        updated_at = CURRENT_TIMESTAMP
+'''
+
+
+def _connect(db_path):
+    """
+    Open the long-lived connection shared by a database object
+    
+    Autocommit mode (isolation_level=None) so transactions are explicit,
+    WAL so readers don't block the writer thread.
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+
+def _locked(method):
+    """Run a method under the connection lock, rolling back if it raises
+    
+    Raises sqlite3.ProgrammingError once the database has been closed.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError('Cannot operate on a closed database.')
+            try:
+                return method(self, *args, **kwargs)
+            except BaseException:
+                if self.conn.in_transaction:
+                    self.conn.rollback()
+                raise
+    
+    return wrapper
+
+
+@lru_cache(maxsize=16)
+def _recent_sql(n_crops):
+    """Recent health detections for n crop types, one positional bind per crop"""
+    placeholders = ','.join('?' * n_crops)
+    return f'''
+        SELECT * FROM health_detections
+        WHERE crop_type IN ({placeholders})
+        ORDER BY timestamp DESC
+        LIMIT ?
+    '''
+
+
 class EventDatabase:
     """Manages SQLite database for detection events"""
     
@@ -23,15 +97,22 @@ class EventDatabase:
         # Create directory if needed
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
+        # One connection per database, shared across threads behind a lock
+        self.conn = _connect(db_path)
+        self._lock = threading.RLock()
+        self._closed = False
+        
         # Initialize database
         self._init_database()
         
         print(f"🗄️ EventDatabase initialized: {db_path}")
     
+    @_locked
     def _init_database(self):
         """Create tables if they don't exist"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
+        cursor.execute('BEGIN')
         
         # Detection events table
         cursor.execute('''
@@ -92,8 +173,8 @@ class EventDatabase:
         ''')
         
         conn.commit()
-        conn.close()
     
+    @_locked
     def log_detection(self, zone_name=None, confidence=0.0, 
                      bbox=None, recording_file=None, metadata=None):
         """
@@ -109,11 +190,58 @@ class EventDatabase:
         Returns:
             Event ID
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
+        cursor.execute('BEGIN')
         
-        timestamp = datetime.now().isoformat()
+        row = self._detection_row(datetime.now().isoformat(), zone_name,
+                                  confidence, bbox, recording_file, metadata)
+        cursor.execute(INSERT_DETECTION_SQL, row)
+        
+        event_id = cursor.lastrowid
+        
+        conn.commit()
+        
+        return event_id
+    
+    @_locked
+    def log_detections(self, detections):
+        """
+        Log a batch of person detection events in a single transaction
+        
+        Args:
+            detections: List of dicts with log_detection() keyword arguments,
+                        plus an optional 'timestamp' (ISO format)
         
+        Returns:
+            Number of events written
+        """
+        if not detections:
+            return 0
+        
+        rows = [
+            self._detection_row(
+                det.get('timestamp') or datetime.now().isoformat(),
+                det.get('zone_name'),
+                det.get('confidence', 0.0),
+                det.get('bbox'),
+                det.get('recording_file'),
+                det.get('metadata')
+            )
+            for det in detections
+        ]
+        
+        conn = self.conn
+        conn.execute('BEGIN')
+        conn.executemany(INSERT_DETECTION_SQL, rows)
+        conn.commit()
+        
+        return len(rows)
+    
+    @staticmethod
+    def _detection_row(timestamp, zone_name, confidence, bbox,
+                       recording_file, metadata):
+        """Build the detection_events parameter tuple"""
         # Parse bounding box (handle numpy arrays)
         if bbox is not None and len(bbox) == 4:
             x1, y1, x2, y2 = bbox
@@ -123,21 +251,10 @@ class EventDatabase:
         # Convert metadata to JSON
         metadata_json = json.dumps(metadata) if metadata else None
         
-        cursor.execute('''
-            INSERT INTO detection_events 
-            (timestamp, event_type, zone_name, confidence, 
-             bbox_x1, bbox_y1, bbox_x2, bbox_y2, recording_file, metadata)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (timestamp, 'person_detected', zone_name, confidence,
-              x1, y1, x2, y2, recording_file, metadata_json))
-        
-        event_id = cursor.lastrowid
-        
-        conn.commit()
-        conn.close()
-        
-        return event_id
+        return (timestamp, 'person_detected', zone_name, confidence,
+                x1, y1, x2, y2, recording_file, metadata_json)
     
+    @_locked
     def log_system_event(self, event_type, severity='info', 
                         message=None, metadata=None):
         """
@@ -152,25 +269,23 @@ class EventDatabase:
         Returns:
             Event ID
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
+        cursor.execute('BEGIN')
         
         timestamp = datetime.now().isoformat()
         metadata_json = json.dumps(metadata) if metadata else None
         
-        cursor.execute('''
-            INSERT INTO system_events 
-            (timestamp, event_type, severity, message, metadata)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (timestamp, event_type, severity, message, metadata_json))
+        cursor.execute(INSERT_SYSTEM_EVENT_SQL,
+                       (timestamp, event_type, severity, message, metadata_json))
         
         event_id = cursor.lastrowid
         
         conn.commit()
-        conn.close()
         
         return event_id
     
+    @_locked
     def update_daily_stats(self, date=None, detections=0, 
                           alerts=0, recordings=0, zones=None):
         """
@@ -186,27 +301,19 @@ class EventDatabase:
         if date is None:
             date = datetime.now().strftime('%Y-%m-%d')
         
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
+        cursor.execute('BEGIN')
         
         zones_json = json.dumps(zones) if zones else None
         
-        cursor.execute('''
-            INSERT INTO daily_stats 
-            (date, total_detections, total_alerts, total_recordings, zones_triggered)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(date) DO UPDATE SET
-                total_detections = total_detections + ?,
-                total_alerts = total_alerts + ?,
-                total_recordings = total_recordings + ?,
-                zones_triggered = ?,
-                updated_at = CURRENT_TIMESTAMP
-        ''', (date, detections, alerts, recordings, zones_json,
-              detections, alerts, recordings, zones_json))
+        cursor.execute(UPSERT_DAILY_STATS_SQL,
+                       (date, detections, alerts, recordings, zones_json,
+                        detections, alerts, recordings, zones_json))
         
         conn.commit()
-        conn.close()
     
+    @_locked
     def get_recent_detections(self, limit=10, zone_name=None):
         """
         Get recent detection events
@@ -218,9 +325,9 @@ class EventDatabase:
         Returns:
             List of detection events
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        conn = self.conn
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
         
         if zone_name:
             cursor.execute('''
@@ -255,9 +362,9 @@ class EventDatabase:
                     event[coord] = float(event[coord])
             events.append(event)
         
-        conn.close()
         return events
     
+    @_locked
     def get_detections_by_timerange(self, start_time, end_time):
         """
         Get detections within time range
@@ -269,9 +376,9 @@ class EventDatabase:
         Returns:
             List of detection events
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        conn = self.conn
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
         
         cursor.execute('''
             SELECT * FROM detection_events 
@@ -282,9 +389,9 @@ class EventDatabase:
         rows = cursor.fetchall()
         events = [dict(row) for row in rows]
         
-        conn.close()
         return events
     
+    @_locked
     def get_zone_statistics(self, days=7):
         """
         Get detection statistics by zone
@@ -295,7 +402,7 @@ class EventDatabase:
         Returns:
             Dict with zone statistics
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -325,9 +432,9 @@ class EventDatabase:
                 'last_detection': row[5]
             }
         
-        conn.close()
         return stats
     
+    @_locked
     def get_daily_summary(self, date=None):
         """
         Get daily statistics summary
@@ -341,9 +448,9 @@ class EventDatabase:
         if date is None:
             date = datetime.now().strftime('%Y-%m-%d')
         
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        conn = self.conn
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
         
         cursor.execute('''
             SELECT * FROM daily_stats 
@@ -359,9 +466,9 @@ class EventDatabase:
         else:
             summary = None
         
-        conn.close()
         return summary
     
+    @_locked
     def cleanup_old_events(self, days=30):
         """
         Delete events older than specified days
@@ -372,8 +479,9 @@ class EventDatabase:
         Returns:
             Number of deleted events
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
+        cursor.execute('BEGIN')
         
         # Delete old detection events
         cursor.execute('''
@@ -392,7 +500,6 @@ class EventDatabase:
         system_deleted = cursor.rowcount
         
         conn.commit()
-        conn.close()
         
         total_deleted = detections_deleted + system_deleted
         
@@ -401,9 +508,10 @@ class EventDatabase:
         
         return total_deleted
     
+    @_locked
     def get_total_events(self):
         """Get total number of events in database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
         
         cursor.execute('SELECT COUNT(*) FROM detection_events')
@@ -412,13 +520,18 @@ class EventDatabase:
         cursor.execute('SELECT COUNT(*) FROM system_events')
         system = cursor.fetchone()[0]
         
-        conn.close()
-        
         return {
             'detections': detections,
             'system_events': system,
             'total': detections + system
         }
+    
+    def close(self):
+        """Close the shared database connection; later calls raise"""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self.conn.close()
 
 
 class HealthDatabase:
@@ -436,15 +549,22 @@ class HealthDatabase:
         # Create directory if needed
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
+        # One connection per database, shared across threads behind a lock
+        self.conn = _connect(db_path)
+        self._lock = threading.RLock()
+        self._closed = False
+        
         # Initialize database
         self._init_database()
         
         print(f"🌱 HealthDatabase initialized: {db_path}")
     
+    @_locked
     def _init_database(self):
         """Create health detection tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
+        cursor.execute('BEGIN')
         
         # Health detection events table
         cursor.execute('''
@@ -508,8 +628,8 @@ class HealthDatabase:
         ''')
         
         conn.commit()
-        conn.close()
     
+    @_locked
     def log_detection(self, detection: dict, image_path: str = None):
         """
         Log a health detection event
@@ -518,8 +638,9 @@ class HealthDatabase:
             detection: Detection dictionary from CropDiseaseDetector
             image_path: Optional path to saved image
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
+        cursor.execute('BEGIN')
         
         recommendations = detection.get('recommendations', {})
         
@@ -585,23 +706,29 @@ class HealthDatabase:
         ))
         
         conn.commit()
-        conn.close()
     
-    def get_recent_detections(self, limit: int = 10, crop_type: str = None):
+    @_locked
+    def get_recent_detections(self, limit: int = 10, crop_type=None):
         """
         Get recent health detection events
         
         Args:
             limit: Maximum number of records to return
-            crop_type: Optional filter by crop type
+            crop_type: Optional filter by crop type (name or list of names;
+                an empty list matches nothing)
             
         Returns:
             List of detection records
         """
-        conn = sqlite3.connect(self.db_path)
+        if isinstance(crop_type, (list, tuple)) and not crop_type:
+            return []
+        
+        conn = self.conn
         cursor = conn.cursor()
         
-        if crop_type:
+        if isinstance(crop_type, (list, tuple)):
+            cursor.execute(_recent_sql(len(crop_type)), (*crop_type, limit))
+        elif crop_type:
             cursor.execute('''
                 SELECT * FROM health_detections 
                 WHERE crop_type = ?
@@ -631,9 +758,9 @@ class HealthDatabase:
                 record['prevention'] = json.loads(record['prevention'])
             results.append(record)
         
-        conn.close()
         return results
     
+    @_locked
     def get_disease_statistics(self, limit: int = None):
         """
         Get disease detection statistics
@@ -644,7 +771,7 @@ class HealthDatabase:
         Returns:
             List of disease statistics
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
         
         query = '''
@@ -653,16 +780,17 @@ class HealthDatabase:
         '''
         
         if limit:
-            query += f' LIMIT {limit}'
-        
-        cursor.execute(query)
+            query += ' LIMIT ?'
+            cursor.execute(query, (limit,))
+        else:
+            cursor.execute(query)
         
         columns = [desc[0] for desc in cursor.description]
         results = [dict(zip(columns, row)) for row in cursor.fetchall()]
         
-        conn.close()
         return results
     
+    @_locked
     def get_crop_statistics(self):
         """
         Get crop monitoring statistics
@@ -670,7 +798,7 @@ class HealthDatabase:
         Returns:
             List of crop statistics
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -681,9 +809,9 @@ class HealthDatabase:
         columns = [desc[0] for desc in cursor.description]
         results = [dict(zip(columns, row)) for row in cursor.fetchall()]
         
-        conn.close()
         return results
     
+    @_locked
     def get_health_summary(self):
         """
         Get overall health monitoring summary
@@ -691,7 +819,7 @@ class HealthDatabase:
         Returns:
             Dictionary with summary statistics
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
         
         # Total detections
@@ -731,8 +859,6 @@ class HealthDatabase:
         ''')
         top_crop = cursor.fetchone()
         
-        conn.close()
-        
         summary = {
             'total_detections': total_detections,
             'healthy_count': healthy_count,
@@ -748,6 +874,7 @@ class HealthDatabase:
         
         return summary
     
+    @_locked
     def get_detections_by_date(self, start_date: str, end_date: str = None):
         """
         Get detections within a date range
@@ -759,7 +886,7 @@ class HealthDatabase:
         Returns:
             List of detection records
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
         
         if end_date:
@@ -778,9 +905,9 @@ class HealthDatabase:
         columns = [desc[0] for desc in cursor.description]
         results = [dict(zip(columns, row)) for row in cursor.fetchall()]
         
-        conn.close()
         return results
     
+    @_locked
     def cleanup_old_records(self, days: int = 30):
         """
         Delete detection records older than specified days
@@ -791,8 +918,9 @@ class HealthDatabase:
         Returns:
             Number of records deleted
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
+        cursor.execute('BEGIN')
         
         cursor.execute('''
             DELETE FROM health_detections 
@@ -802,13 +930,13 @@ class HealthDatabase:
         deleted = cursor.rowcount
         
         conn.commit()
-        conn.close()
         
         if deleted > 0:
             print(f"🗑️ Health database cleanup: Deleted {deleted} old records")
         
         return deleted
     
+    @_locked
     def export_to_csv(self, output_path: str, start_date: str = None):
         """
         Export detection records to CSV file
@@ -819,7 +947,7 @@ class HealthDatabase:
         """
         import csv
         
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
         
         if start_date:
@@ -844,5 +972,11 @@ class HealthDatabase:
                            'Confidence', 'Is Healthy', 'Severity'])
             writer.writerows(cursor.fetchall())
         
-        conn.close()
         print(f"📄 Exported health records to: {output_path}")
+    
+    def close(self):
+        """Close the shared database connection; later calls raise"""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self.conn.close()
@@ -5,6 +5,7 @@ from ultralytics import YOLO
 import cv2
 import numpy as np
 from typing import List, Tuple, Optional
+import statistics
 import time
 
 
@@ -115,43 +116,75 @@ class PersonDetector:
         
         return detections, annotated_frame
     
-    def benchmark_inference(self, frame: np.ndarray, num_runs: int = 10) -> dict:
+    def benchmark_inference(self, frame: np.ndarray, num_runs: int = 10,
+                            warmup_runs: int = 2,
+                            time_budget_s: Optional[float] = None) -> dict:
         """
         Benchmark inference speed
         
+        Warmup runs are discarded so cold-start cost doesn't skew the
+        result, and timing stops early once the last 5 runs agree within 5%.
+        
         Args:
             frame: Test frame
-            num_runs: Number of inference runs
+            num_runs: Maximum number of timed inference runs
+            warmup_runs: Untimed runs before measuring
+            time_budget_s: Optional wall-time limit for the timed runs
             
         Returns:
-            Dict with timing statistics
+            Dict with timing statistics (fps is based on the median)
         """
+        if num_runs < 1:
+            raise ValueError(f"num_runs must be at least 1, got {num_runs}")
+        
         if self.model is None:
             return {'error': 'Model not loaded'}
         
-        print(f"\n🔬 Benchmarking inference ({num_runs} runs)...")
+        print(f"\n🔬 Benchmarking inference (up to {num_runs} runs, {warmup_runs} warmup)...")
+        
+        for _ in range(warmup_runs):
+            self.model(frame, imgsz=self.input_size,
+                       conf=self.conf_threshold, verbose=False)
         
         times = []
+        budget_start = time.perf_counter()
         for i in range(num_runs):
-            start = time.time()
+            start = time.perf_counter()
             _ = self.model(frame, imgsz=self.input_size, 
                           conf=self.conf_threshold, verbose=False)
-            elapsed = time.time() - start
+            elapsed = time.perf_counter() - start
             times.append(elapsed)
+            
+            # Stop once timings have stabilized
+            if len(times) >= 5:
+                recent = times[-5:]
+                if statistics.stdev(recent) / statistics.median(recent) < 0.05:
+                    break
+            
+            if time_budget_s is not None and time.perf_counter() - budget_start >= time_budget_s:
+                break
         
         avg_time = np.mean(times)
+        median_time = statistics.median(times)
+        p95_time = float(np.percentile(times, 95))
         min_time = np.min(times)
         max_time = np.max(times)
-        fps = 1.0 / avg_time if avg_time > 0 else 0
+        fps = 1.0 / median_time if median_time > 0 else 0
         
         stats = {
             'avg_time_ms': avg_time * 1000,
+            'median_ms': median_time * 1000,
+            'p95_ms': p95_time * 1000,
             'min_time_ms': min_time * 1000,
             'max_time_ms': max_time * 1000,
-            'fps': fps
+            'fps': fps,
+            'runs': len(times)
         }
         
+        print(f"   Timed runs: {stats['runs']}")
         print(f"   Average time: {stats['avg_time_ms']:.1f} ms")
+        print(f"   Median time: {stats['median_ms']:.1f} ms")
+        print(f"   P95 time: {stats['p95_ms']:.1f} ms")
         print(f"   Min time: {stats['min_time_ms']:.1f} ms")
         print(f"   Max time: {stats['max_time_ms']:.1f} ms")
         print(f"   Estimated FPS: {stats['fps']:.2f}")
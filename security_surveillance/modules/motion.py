@@ -4,7 +4,7 @@ Optimized for Raspberry Pi 3 - lightweight background subtraction
 """
 import cv2
 import numpy as np
-from typing import Tuple, Optional, List
+from typing import Tuple, Optional, List, Callable
 import time
 
 
@@ -33,6 +33,7 @@ class MotionDetector:
         self.sensitivity = sensitivity
         self.min_area = min_area
         self.blur_size = blur_size if blur_size % 2 == 1 else blur_size + 1
+        self.detect_shadows = detect_shadows
         
         # Use MOG2 background subtractor (efficient on Pi 3)
         self.bg_subtractor = cv2.createBackgroundSubtractorMOG2(
@@ -50,12 +51,22 @@ class MotionDetector:
         self.motion_contours = []
         self.motion_mask = None
         
-    def detect(self, frame: np.ndarray) -> Tuple[bool, List[Tuple[int, int, int, int]]]:
+        # Morphology kernel (constant, built once)
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+    
+    def detect(self, frame: np.ndarray,
+               gray: Optional[np.ndarray] = None,
+               blur_out: Optional[np.ndarray] = None,
+               mask_out: Optional[np.ndarray] = None) -> Tuple[bool, List[Tuple[int, int, int, int]]]:
         """
         Detect motion in frame
         
         Args:
             frame: Input BGR frame
+            gray: Precomputed grayscale of frame (skips the conversion)
+            blur_out: Preallocated (H, W) uint8 buffer for the blurred frame
+            mask_out: Preallocated (H, W) uint8 buffer for the foreground mask;
+                      motion_mask then refers to this buffer
             
         Returns:
             (has_motion, bounding_boxes) where bounding_boxes is list of (x, y, w, h)
@@ -63,22 +74,24 @@ class MotionDetector:
         self.frame_count += 1
         
         # Convert to grayscale and blur to reduce noise
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(gray, (self.blur_size, self.blur_size), 0)
+        if gray is None:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        blurred = cv2.GaussianBlur(gray, (self.blur_size, self.blur_size), 0, dst=blur_out)
         
         # Apply background subtraction
-        fg_mask = self.bg_subtractor.apply(blurred)
+        fg_mask = self.bg_subtractor.apply(blurred, fgmask=mask_out)
         
-        # Remove shadows (value 127) if shadow detection is on
-        _, fg_mask = cv2.threshold(fg_mask, 200, 255, cv2.THRESH_BINARY)
+        # Remove shadows (value 127) if shadow detection is on (in place from here on);
+        # without shadows MOG2 already emits a 0/255 mask, so skip the extra pass
+        if self.detect_shadows:
+            cv2.threshold(fg_mask, 200, 255, cv2.THRESH_BINARY, dst=fg_mask)
         
         # Morphological operations to remove noise
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_OPEN, kernel, iterations=2)
-        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_CLOSE, kernel, iterations=2)
+        cv2.morphologyEx(fg_mask, cv2.MORPH_OPEN, self.kernel, dst=fg_mask, iterations=2)
+        cv2.morphologyEx(fg_mask, cv2.MORPH_CLOSE, self.kernel, dst=fg_mask, iterations=2)
         
         # Dilate to fill gaps
-        fg_mask = cv2.dilate(fg_mask, kernel, iterations=2)
+        cv2.dilate(fg_mask, self.kernel, dst=fg_mask, iterations=2)
         
         # Store for visualization
         self.motion_mask = fg_mask
@@ -184,7 +197,8 @@ class SmartMotionFilter:
     def __init__(self, 
                  motion_threshold: float = 0.02,
                  cooldown_seconds: int = 2,
-                 min_motion_frames: int = 2):
+                 min_motion_frames: int = 2,
+                 time_fn: Callable[[], float] = time.time):
         """
         Initialize smart motion filter
         
@@ -192,7 +206,9 @@ class SmartMotionFilter:
             motion_threshold: Minimum motion percentage to trigger detection
             cooldown_seconds: Seconds to wait after last motion before re-triggering
             min_motion_frames: Minimum consecutive frames with motion to trigger
+            time_fn: Clock returning seconds (override for deterministic tests)
         """
+        self.time_fn = time_fn
         self.motion_threshold = motion_threshold
         self.cooldown_seconds = cooldown_seconds
         self.min_motion_frames = min_motion_frames
@@ -211,7 +227,7 @@ class SmartMotionFilter:
         Returns:
             True if person detection should run
         """
-        current_time = time.time()
+        current_time = self.time_fn()
         
         # Check cooldown period
         if current_time - self.last_trigger_time < self.cooldown_seconds:
@@ -3,10 +3,10 @@ Performance optimization module for Raspberry Pi 3
 Threading, frame buffering, and smart inference management
 """
 import threading
-import queue
 import time
+from collections import deque
 import numpy as np
-from typing import Optional, Callable, Dict, Any
+from typing import Optional, Callable, Dict, Any, List, Iterator
 import cv2
 
 
@@ -14,6 +14,10 @@ class ThreadedCamera:
     """
     Threaded camera capture for non-blocking frame reading
     Keeps fresh frames available while inference runs in parallel
+    
+    Single producer / single consumer: frames go through a bounded deque
+    (append/popleft are atomic under the GIL), and the reader only blocks
+    on an Event when the buffer is empty.
     """
     
     def __init__(self, camera, buffer_size: int = 2):
@@ -25,7 +29,8 @@ class ThreadedCamera:
             buffer_size: Maximum frames to buffer (small = more current)
         """
         self.camera = camera
-        self.frame_queue = queue.Queue(maxsize=buffer_size)
+        self.frame_buffer = deque(maxlen=buffer_size)
+        self.frame_ready = threading.Event()
         self.running = False
         self.thread = None
         
@@ -53,35 +58,83 @@ class ThreadedCamera:
                 self.frames_captured += 1
                 self.last_frame_time = time.time()
                 
-                try:
-                    # Non-blocking put, drops old frames if buffer full
-                    self.frame_queue.put(frame, block=False)
-                except queue.Full:
+                # Full buffer: the deque drops the oldest frame on append
+                if len(self.frame_buffer) == self.frame_buffer.maxlen:
                     self.frames_dropped += 1
-                    # Remove oldest frame and add new one
-                    try:
-                        self.frame_queue.get_nowait()
-                        self.frame_queue.put(frame, block=False)
-                    except:
-                        pass
+                self.frame_buffer.append(frame)
+                self.frame_ready.set()
             else:
                 time.sleep(0.01)  # Brief pause on read failure
     
-    def read(self) -> Optional[np.ndarray]:
+    def _pop(self, timeout: float) -> Optional[np.ndarray]:
+        """Take the oldest buffered frame, waiting up to timeout if empty"""
+        deadline = time.time() + timeout
+        
+        while True:
+            try:
+                return self.frame_buffer.popleft()
+            except IndexError:
+                pass
+            
+            # Clear, then re-check so a frame appended in between isn't missed
+            self.frame_ready.clear()
+            if self.frame_buffer:
+                continue
+            
+            remaining = deadline - time.time()
+            if remaining <= 0 or not self.frame_ready.wait(remaining):
+                return None
+    
+    def read(self, timeout: float = 1.0) -> Optional[np.ndarray]:
         """
         Read latest frame from buffer
         
+        Args:
+            timeout: Maximum seconds to wait for a frame
+        
         Returns:
             Latest frame or None if buffer empty
         """
-        try:
-            return self.frame_queue.get(timeout=1.0)
-        except queue.Empty:
-            return None
+        return self._pop(timeout)
+    
+    def read_batch(self, n: int, timeout: float = 1.0) -> List[np.ndarray]:
+        """
+        Read up to n frames, waiting only while the buffer is empty
+        
+        Args:
+            n: Number of frames wanted
+            timeout: Maximum seconds to wait for the batch to fill
+        
+        Returns:
+            List of frames (fewer than n if the timeout expired)
+        """
+        frames = []
+        deadline = time.time() + timeout
+        
+        while len(frames) < n:
+            frame = self._pop(max(0.0, deadline - time.time()))
+            if frame is None:
+                break
+            frames.append(frame)
+        
+        return frames
+    
+    def read_iter(self, timeout: float = 1.0) -> Iterator[np.ndarray]:
+        """
+        Yield frames as they arrive until the camera is stopped
+        
+        Args:
+            timeout: Seconds to wait per frame before re-checking running
+        """
+        while self.running:
+            frame = self._pop(timeout)
+            if frame is not None:
+                yield frame
     
     def stop(self):
         """Stop capture thread"""
         self.running = False
+        self.frame_ready.set()  # Wake a blocked reader
         if self.thread:
             self.thread.join(timeout=2.0)
         print("✅ Threaded camera capture stopped")
@@ -92,7 +145,7 @@ class ThreadedCamera:
             'frames_captured': self.frames_captured,
             'frames_dropped': self.frames_dropped,
             'drop_rate': self.frames_dropped / self.frames_captured if self.frames_captured > 0 else 0,
-            'buffer_size': self.frame_queue.qsize(),
+            'buffer_size': len(self.frame_buffer),
             'last_frame_age': time.time() - self.last_frame_time if self.last_frame_time > 0 else None
         }
 
@@ -153,13 +206,15 @@ class InferenceThrottler:
     Prevents CPU overload on Pi 3
     """
     
-    def __init__(self, target_fps: float = 2.0):
+    def __init__(self, target_fps: float = 2.0, time_fn: Callable[[], float] = time.time):
         """
         Initialize throttler
         
         Args:
             target_fps: Target inference rate (FPS)
+            time_fn: Clock returning seconds (override for deterministic tests)
         """
+        self.time_fn = time_fn
         self.target_fps = target_fps
         self.min_interval = 1.0 / target_fps
         self.last_inference_time = 0
@@ -172,7 +227,7 @@ class InferenceThrottler:
         Returns:
             True if inference should run
         """
-        current_time = time.time()
+        current_time = self.time_fn()
         elapsed = current_time - self.last_inference_time
         
         if elapsed >= self.min_interval:
@@ -184,7 +239,7 @@ class InferenceThrottler:
     
     def wait_if_needed(self):
         """Sleep if running too fast to maintain target FPS"""
-        current_time = time.time()
+        current_time = self.time_fn()
         elapsed = current_time - self.last_inference_time
         
         if elapsed < self.min_interval:
@@ -193,7 +248,7 @@ class InferenceThrottler:
     
     def get_stats(self) -> Dict[str, Any]:
         """Get throttling statistics"""
-        elapsed = time.time() - self.last_inference_time if self.inference_count > 0 else 0
+        elapsed = self.time_fn() - self.last_inference_time if self.inference_count > 0 else 0
         
         return {
             'inference_count': self.inference_count,
@@ -3,9 +3,9 @@ Video Recording Module
 Handles event-triggered video recording with pre/post buffers
 """
 import cv2
+import numpy as np
 import os
 from datetime import datetime
-from collections import deque
 import threading
 import time
 
@@ -19,7 +19,8 @@ class VideoRecorder:
                  fps=10,
                  resolution=(640, 480),
                  codec='mp4v',
-                 max_recording_duration=300):
+                 max_recording_duration=300,
+                 time_fn=time.time):
         """
         Initialize video recorder
         
@@ -31,6 +32,7 @@ class VideoRecorder:
             resolution: Video resolution (width, height)
             codec: Video codec (mp4v, avc1, etc.)
             max_recording_duration: Maximum recording length in seconds
+            time_fn: Clock returning seconds (override for deterministic tests)
         """
         self.output_dir = output_dir
         self.pre_buffer_seconds = pre_buffer_seconds
@@ -39,13 +41,18 @@ class VideoRecorder:
         self.resolution = resolution
         self.codec = codec
         self.max_recording_duration = max_recording_duration
+        self.time_fn = time_fn
         
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
         
-        # Pre-event frame buffer (circular buffer)
+        # Pre-event frame buffer: one preallocated ring of frames, created
+        # on the first add_frame() once the frame shape is known
         buffer_size = int(fps * pre_buffer_seconds)
-        self.frame_buffer = deque(maxlen=buffer_size)
+        self.buffer_size = buffer_size
+        self._ring = None
+        self._ring_pos = 0      # Next slot to write
+        self._ring_count = 0    # Frames currently buffered
         
         # Recording state
         self.is_recording = False
@@ -72,7 +79,27 @@ class VideoRecorder:
             frame: Video frame to buffer
         """
         with self.lock:
-            self.frame_buffer.append(frame.copy())
+            if self.buffer_size <= 0:
+                return
+            
+            if self._ring is None or self._ring.shape[1:] != frame.shape:
+                self._ring = np.empty((self.buffer_size,) + frame.shape, dtype=frame.dtype)
+                self._ring_pos = 0
+                self._ring_count = 0
+            
+            np.copyto(self._ring[self._ring_pos], frame)
+            self._ring_pos = (self._ring_pos + 1) % self.buffer_size
+            self._ring_count = min(self._ring_count + 1, self.buffer_size)
+    
+    def _buffered_frames(self):
+        """Buffered frames, oldest first (views into the ring; must hold lock)"""
+        if self._ring is None:
+            return []
+        if self._ring_count < self.buffer_size:
+            return self._ring[:self._ring_count]
+        
+        # Full ring: the oldest frame sits at the write position
+        return [*self._ring[self._ring_pos:], *self._ring[:self._ring_pos]]
     
     def start_recording(self, event_type='detection', metadata=None):
         """
@@ -88,7 +115,7 @@ class VideoRecorder:
         with self.lock:
             if self.is_recording:
                 # Already recording, update last detection time
-                self.last_detection_time = time.time()
+                self.last_detection_time = self.time_fn()
                 return None
             
             # Generate filename with timestamp
@@ -113,16 +140,16 @@ class VideoRecorder:
                 return None
             
             # Write pre-buffered frames
-            for buffered_frame in self.frame_buffer:
+            for buffered_frame in self._buffered_frames():
                 self.current_writer.write(buffered_frame)
             
             self.is_recording = True
-            self.recording_start_time = time.time()
-            self.last_detection_time = time.time()
-            self.frame_count = len(self.frame_buffer)
+            self.recording_start_time = self.time_fn()
+            self.last_detection_time = self.time_fn()
+            self.frame_count = self._ring_count
             
             print(f"🎬 Recording started: {os.path.basename(self.current_filename)}")
-            print(f"   Pre-buffered frames: {len(self.frame_buffer)}")
+            print(f"   Pre-buffered frames: {self._ring_count}")
             if metadata:
                 print(f"   Metadata: {metadata}")
             
@@ -149,10 +176,10 @@ class VideoRecorder:
             
             # Update last detection time
             if has_detection:
-                self.last_detection_time = time.time()
+                self.last_detection_time = self.time_fn()
             
             # Check if we should stop recording
-            current_time = time.time()
+            current_time = self.time_fn()
             time_since_detection = current_time - self.last_detection_time
             recording_duration = current_time - self.recording_start_time
             
@@ -172,7 +199,7 @@ class VideoRecorder:
             self.current_writer.release()
             self.current_writer = None
             
-            duration = time.time() - self.recording_start_time
+            duration = self.time_fn() - self.recording_start_time
             print(f"⏹️  Recording stopped: {os.path.basename(self.current_filename)}")
             print(f"   Duration: {duration:.1f}s")
             print(f"   Frames: {self.frame_count}")
@@ -198,17 +225,17 @@ class VideoRecorder:
             if not self.is_recording:
                 return {
                     'recording': False,
-                    'buffer_size': len(self.frame_buffer)
+                    'buffer_size': self._ring_count
                 }
             
-            current_time = time.time()
+            current_time = self.time_fn()
             return {
                 'recording': True,
                 'filename': os.path.basename(self.current_filename),
                 'duration': current_time - self.recording_start_time,
                 'frames': self.frame_count,
                 'time_since_detection': current_time - self.last_detection_time,
-                'buffer_size': len(self.frame_buffer)
+                'buffer_size': self._ring_count
             }
     
     def cleanup(self):
@@ -216,7 +243,8 @@ class VideoRecorder:
         with self.lock:
             if self.is_recording:
                 self._stop_recording()
-            self.frame_buffer.clear()
+            self._ring_pos = 0
+            self._ring_count = 0
         print("📹 VideoRecorder cleaned up")
 
 
@@ -225,7 +253,9 @@ class StorageManager:
     
     def __init__(self, recordings_dir='data/recordings',
                  max_storage_mb=1000,
-                 min_free_space_mb=100):
+                 min_free_space_mb=100,
+                 usage_cache_seconds=2.0,
+                 time_fn=time.time):
         """
         Initialize storage manager
         
@@ -233,10 +263,17 @@ class StorageManager:
             recordings_dir: Directory containing recordings
             max_storage_mb: Maximum storage for recordings (MB)
             min_free_space_mb: Minimum free space to maintain (MB)
+            usage_cache_seconds: How long get_storage_usage() reuses a directory scan
+            time_fn: Clock returning seconds (override for deterministic tests)
         """
         self.recordings_dir = recordings_dir
         self.max_storage_bytes = max_storage_mb * 1024 * 1024
         self.min_free_space_bytes = min_free_space_mb * 1024 * 1024
+        self.usage_cache_seconds = usage_cache_seconds
+        self.time_fn = time_fn
+        
+        # (scan time, usage dict) from the last get_storage_usage() scan
+        self._usage_cache = None
         
         os.makedirs(recordings_dir, exist_ok=True)
         
@@ -244,24 +281,38 @@ class StorageManager:
         print(f"   Max storage: {max_storage_mb} MB")
         print(f"   Min free space: {min_free_space_mb} MB")
     
+    def _scan_recordings(self):
+        """
+        List recordings in a single directory pass
+        
+        Returns:
+            List of (path, os.stat_result) for each .mp4 file
+        """
+        if not os.path.exists(self.recordings_dir):
+            return []
+        
+        with os.scandir(self.recordings_dir) as entries:
+            return [(entry.path, entry.stat()) for entry in entries
+                    if entry.name.endswith('.mp4') and entry.is_file()]
+    
     def get_storage_usage(self):
-        """Get current storage usage"""
-        total_size = 0
-        file_count = 0
-        
-        if os.path.exists(self.recordings_dir):
-            for filename in os.listdir(self.recordings_dir):
-                filepath = os.path.join(self.recordings_dir, filename)
-                if os.path.isfile(filepath) and filename.endswith('.mp4'):
-                    total_size += os.path.getsize(filepath)
-                    file_count += 1
-        
-        return {
+        """Get current storage usage (cached for usage_cache_seconds)"""
+        now = self.time_fn()
+        if self._usage_cache and now - self._usage_cache[0] < self.usage_cache_seconds:
+            return dict(self._usage_cache[1])
+        
+        files = self._scan_recordings()
+        total_size = sum(stat.st_size for _, stat in files)
+        
+        usage = {
             'total_bytes': total_size,
             'total_mb': total_size / (1024 * 1024),
-            'file_count': file_count,
+            'file_count': len(files),
             'max_mb': self.max_storage_bytes / (1024 * 1024)
         }
+        self._usage_cache = (now, usage)
+        
+        return dict(usage)
     
     def cleanup_old_recordings(self, force=False):
         """
@@ -273,20 +324,13 @@ class StorageManager:
         Returns:
             Number of files deleted
         """
-        usage = self.get_storage_usage()
+        # Always rescan here rather than trusting the usage cache
+        files = [(path, stat.st_mtime, stat.st_size) for path, stat in self._scan_recordings()]
+        total_bytes = sum(size for _, _, size in files)
         
-        if not force and usage['total_bytes'] < self.max_storage_bytes:
+        if not force and total_bytes < self.max_storage_bytes:
             return 0
         
-        # Get all recording files with timestamps
-        files = []
-        for filename in os.listdir(self.recordings_dir):
-            filepath = os.path.join(self.recordings_dir, filename)
-            if os.path.isfile(filepath) and filename.endswith('.mp4'):
-                mtime = os.path.getmtime(filepath)
-                size = os.path.getsize(filepath)
-                files.append((filepath, mtime, size))
-        
         # Sort by modification time (oldest first)
         files.sort(key=lambda x: x[1])
         
@@ -295,7 +339,7 @@ class StorageManager:
         freed_space = 0
         
         for filepath, mtime, size in files:
-            if usage['total_bytes'] - freed_space < self.max_storage_bytes * 0.8:
+            if total_bytes - freed_space < self.max_storage_bytes * 0.8:
                 break  # Keep deleting until 80% of max
             
             try:
@@ -307,6 +351,7 @@ class StorageManager:
                 print(f"❌ Failed to delete {filepath}: {e}")
         
         if deleted_count > 0:
+            self._usage_cache = None
             print(f"💾 Storage cleanup: Deleted {deleted_count} files, freed {freed_space / (1024*1024):.1f} MB")
         
         return deleted_count
@@ -318,15 +363,9 @@ class StorageManager:
     
     def get_oldest_recording(self):
         """Get path to oldest recording"""
-        files = []
-        for filename in os.listdir(self.recordings_dir):
-            filepath = os.path.join(self.recordings_dir, filename)
-            if os.path.isfile(filepath) and filename.endswith('.mp4'):
-                mtime = os.path.getmtime(filepath)
-                files.append((filepath, mtime))
+        files = self._scan_recordings()
         
         if not files:
             return None
         
-        files.sort(key=lambda x: x[1])
-        return files[0][0]
+        return min(files, key=lambda f: f[1].st_mtime)[0]
@@ -15,7 +15,8 @@ class TamperDetector:
                  brightness_threshold=20,
                  movement_threshold=0.15,
                  history_size=30,
-                 check_interval=1.0):
+                 check_interval=1.0,
+                 time_fn=time.time):
         """
         Initialize tamper detector
         
@@ -24,16 +25,19 @@ class TamperDetector:
             movement_threshold: Frame difference percentage indicating movement
             history_size: Number of frames to track for baseline
             check_interval: Seconds between tamper checks (reduce CPU usage)
+            time_fn: Clock returning seconds (override for deterministic tests)
         """
         self.brightness_threshold = brightness_threshold
         self.movement_threshold = movement_threshold
         self.history_size = history_size
         self.check_interval = check_interval
+        self.time_fn = time_fn
         
         # Baseline tracking
         self.brightness_history = deque(maxlen=history_size)
         self.baseline_brightness = None
         self.baseline_frame = None
+        self._baseline_gray = None
         self.baseline_established = False
         
         # State tracking
@@ -53,37 +57,40 @@ class TamperDetector:
         print(f"   Baseline history: {history_size} frames")
         print(f"   Check interval: {check_interval}s")
     
-    def update_baseline(self, frame):
+    def update_baseline(self, frame, gray=None):
         """
         Update baseline brightness from normal frames
         
         Args:
             frame: Video frame to add to baseline
+            gray: Precomputed grayscale of frame (optional)
         """
         # Calculate average brightness
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        avg_brightness = np.mean(gray)
+        if gray is None:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        avg_brightness = cv2.mean(gray)[0]
         
         self.brightness_history.append(avg_brightness)
         
         # Establish baseline after collecting enough samples
         if len(self.brightness_history) >= self.history_size and not self.baseline_established:
             self.baseline_brightness = np.median(list(self.brightness_history))
-            self.baseline_frame = frame.copy()
+            self._set_baseline_frame(frame, gray)
             self.baseline_established = True
             print(f"✅ Tamper baseline established: avg brightness = {self.baseline_brightness:.1f}")
     
-    def check_tampering(self, frame):
+    def check_tampering(self, frame, gray=None):
         """
         Check for camera tampering
         
         Args:
             frame: Current video frame
+            gray: Precomputed grayscale of frame (optional)
         
         Returns:
             Dict with tamper detection results
         """
-        current_time = time.time()
+        current_time = self.time_fn()
         
         # Rate limiting - only check at intervals
         if current_time - self.last_check_time < self.check_interval:
@@ -97,13 +104,18 @@ class TamperDetector:
         self.last_check_time = current_time
         self.total_checks += 1
         
+        # Convert once, shared by every check below
+        if gray is None:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        brightness = cv2.mean(gray)[0]
+        
         # Check 1: Camera covering (sudden darkness)
-        covered = self._check_covering(frame)
+        covered = self._check_covering(frame, gray, brightness)
         
         # Check 2: Camera movement (scene shift)
         moved = False
         if self.baseline_established and not covered:
-            moved = self._check_movement(frame)
+            moved = self._check_movement(frame, gray)
         
         # Update state
         prev_covered = self.is_covered
@@ -118,7 +130,7 @@ class TamperDetector:
             event = {
                 'type': 'camera_covered',
                 'timestamp': current_time,
-                'brightness': np.mean(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+                'brightness': brightness
             }
             self.tamper_events.append(event)
             print(f"🚨 TAMPER DETECTED: Camera covered!")
@@ -128,7 +140,7 @@ class TamperDetector:
             event = {
                 'type': 'camera_moved',
                 'timestamp': current_time,
-                'difference': self._calculate_frame_difference(frame)
+                'difference': self._calculate_frame_difference(frame, gray)
             }
             self.tamper_events.append(event)
             print(f"🚨 TAMPER DETECTED: Camera moved!")
@@ -145,41 +157,59 @@ class TamperDetector:
             'covered': covered,
             'moved': moved,
             'tamper_detected': covered or moved,
-            'brightness': np.mean(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)),
+            'brightness': brightness,
             'baseline_brightness': self.baseline_brightness
         }
     
-    def _check_covering(self, frame):
+    def _set_baseline_frame(self, frame, gray=None):
+        """Store the baseline frame and its grayscale for movement checks"""
+        if frame is None:
+            self.baseline_frame = None
+            self._baseline_gray = None
+            return
+        
+        self.baseline_frame = frame.copy()
+        if gray is None:
+            self._baseline_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        else:
+            self._baseline_gray = gray.copy()
+    
+    def _check_covering(self, frame, gray=None, brightness=None):
         """
         Check if camera is covered (very dark)
         
         Args:
             frame: Video frame
+            gray: Precomputed grayscale of frame (optional)
+            brightness: Precomputed mean brightness of gray (optional)
         
         Returns:
             True if camera appears to be covered
         """
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        avg_brightness = np.mean(gray)
+        if brightness is None:
+            if gray is None:
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            brightness = cv2.mean(gray)[0]
         
         # Camera is covered if extremely dark
-        if avg_brightness < self.brightness_threshold:
+        if brightness < self.brightness_threshold:
             return True
         
         # Also check against baseline (sudden darkness)
         if self.baseline_brightness is not None:
-            brightness_drop = self.baseline_brightness - avg_brightness
+            brightness_drop = self.baseline_brightness - brightness
             if brightness_drop > (self.baseline_brightness * 0.7):  # 70% drop
                 return True
         
         return False
     
-    def _check_movement(self, frame):
+    def _check_movement(self, frame, gray=None):
         """
         Check if camera has moved significantly
         
         Args:
             frame: Current video frame
+            gray: Precomputed grayscale of frame (optional)
         
         Returns:
             True if camera appears to have moved
@@ -187,17 +217,18 @@ class TamperDetector:
         if self.baseline_frame is None:
             return False
         
-        difference = self._calculate_frame_difference(frame)
+        difference = self._calculate_frame_difference(frame, gray)
         
         # Significant movement detected
         return difference > self.movement_threshold
     
-    def _calculate_frame_difference(self, frame):
+    def _calculate_frame_difference(self, frame, gray=None):
         """
         Calculate difference between current frame and baseline
         
         Args:
             frame: Current frame
+            gray: Precomputed grayscale of frame (optional)
         
         Returns:
             Difference percentage (0.0 - 1.0)
@@ -205,13 +236,12 @@ class TamperDetector:
         if self.baseline_frame is None:
             return 0.0
         
-        # Resize both frames to same size
+        # Grayscale baseline is cached; only resize it if the frame size changed
         h, w = frame.shape[:2]
-        baseline_resized = cv2.resize(self.baseline_frame, (w, h))
-        
-        # Convert to grayscale
-        gray1 = cv2.cvtColor(baseline_resized, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        gray1 = self._baseline_gray
+        if gray1.shape != (h, w):
+            gray1 = cv2.resize(gray1, (w, h))
+        gray2 = gray if gray is not None else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         
         # Calculate absolute difference
         diff = cv2.absdiff(gray1, gray2)
@@ -220,7 +250,7 @@ class TamperDetector:
         _, thresh = cv2.threshold(diff, 30, 255, cv2.THRESH_BINARY)
         
         # Calculate percentage of changed pixels
-        changed_pixels = np.count_nonzero(thresh)
+        changed_pixels = cv2.countNonZero(thresh)
         total_pixels = thresh.shape[0] * thresh.shape[1]
         difference_pct = changed_pixels / total_pixels
         
@@ -235,7 +265,7 @@ class TamperDetector:
         """
         self.brightness_history.clear()
         self.baseline_brightness = None
-        self.baseline_frame = frame.copy() if frame is not None else None
+        self._set_baseline_frame(frame)
         self.baseline_established = False
         self.is_covered = False
         self.is_moved = False
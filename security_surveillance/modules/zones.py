@@ -138,6 +138,10 @@ class Zone:
 class ZoneMonitor:
     """Monitors multiple zones and tracks detections"""
     
+    # Centre and four corners as fractions of bbox (w, h), as in Zone.contains_bbox (centre: w // 2)
+    _PROBE_X = np.array([0, 0, 1, 0, 1])
+    _PROBE_Y = np.array([0, 0, 0, 1, 1])
+    
     def __init__(self, zones: List[Zone]):
         """
         Initialize zone monitor
@@ -148,6 +152,103 @@ class ZoneMonitor:
         self.zones = {zone.name: zone for zone in zones}
         self.total_detections = 0
         
+        # Rasterize zone polygons once so check_detections is a mask lookup
+        self._build_zone_masks()
+    
+    def _build_zone_masks(self):
+        """
+        Fill one mask per zone, covering the bounding box of all zones
+        
+        Overlapping zones get separate masks, so a point can hit several.
+        The masks carry a one-pixel empty border: probes outside the zones'
+        bounding box are clipped onto it instead of being range-checked.
+        
+        Only axis-aligned rectangles are rasterized. Along a slanted edge
+        fillPoly and pointPolygonTest can disagree by a pixel, so other
+        shapes are left empty and checked with Zone.contains_bbox instead.
+        """
+        points = [zone.points for zone in self.zones.values()]
+        if points:
+            all_points = np.concatenate(points)
+            origin = all_points.min(axis=0)
+            width, height = all_points.max(axis=0) - origin + 1
+        else:
+            origin = np.zeros(2, dtype=np.int32)
+            width, height = 1, 1
+        
+        # Shift so zone pixels start at (1, 1) inside the border
+        self._mask_origin = origin - 1
+        
+        masks = np.zeros((len(points), height + 2, width + 2), dtype=np.uint8)
+        self._polygon_zones = []
+        for i, zone_points in enumerate(points):
+            if self._is_axis_aligned_rect(zone_points):
+                cv2.fillPoly(masks[i], [zone_points - self._mask_origin], 1)
+            else:
+                self._polygon_zones.append(i)
+        self._zone_masks = masks.view(bool)
+    
+    @staticmethod
+    def _is_axis_aligned_rect(points: np.ndarray) -> bool:
+        """Check for a rectangle whose edges are all horizontal or vertical"""
+        edges = np.diff(points, axis=0, append=points[:1])
+        return (len(np.unique(points[:, 0])) == 2 and
+                len(np.unique(points[:, 1])) == 2 and
+                bool((edges == 0).any(axis=1).all()))
+    
+    def _zones_hit(self, bboxes: List[Tuple[int, int, int, int]]) -> np.ndarray:
+        """
+        Find the zones containing each bbox's center or any of its corners
+        
+        Same result as Zone.contains_bbox at the default overlap threshold.
+        
+        Args:
+            bboxes: List of (x, y, w, h) bounding boxes
+            
+        Returns:
+            (len(bboxes), num_zones) boolean array, zones in self.zones order
+        """
+        boxes = np.array(bboxes).reshape(-1, 4)
+        x, y, w, h = boxes.T[:, :, None]
+        
+        # (D, 5) probe points as contains_bbox computes them, center then corners
+        px = x + w * self._PROBE_X
+        py = y + h * self._PROBE_Y
+        px[:, :1] += w // 2
+        py[:, :1] += h // 2
+        
+        # Out-of-range probes are clipped onto the empty border
+        _, height, width = self._zone_masks.shape
+        origin_x, origin_y = self._mask_origin
+        masks = self._zone_masks
+        
+        # Gather every probe point from every zone mask in one indexing op
+        if boxes.dtype.kind in 'iu':
+            left = (px - origin_x).clip(0, width - 1)
+            top = (py - origin_y).clip(0, height - 1)
+            inside = masks[:, top, left]
+        else:
+            # pointPolygonTest takes float32 points. A fractional probe is
+            # inside a closed rectangle only when the pixels on both sides of
+            # it are: x = 100.5 is outside a zone ending at x = 100
+            px = px.astype(np.float32)
+            py = py.astype(np.float32)
+            left = (np.floor(px).astype(np.int64) - origin_x).clip(0, width - 1)
+            right = (np.ceil(px).astype(np.int64) - origin_x).clip(0, width - 1)
+            top = (np.floor(py).astype(np.int64) - origin_y).clip(0, height - 1)
+            bottom = (np.ceil(py).astype(np.int64) - origin_y).clip(0, height - 1)
+            inside = (masks[:, top, left] & masks[:, top, right] &
+                      masks[:, bottom, left] & masks[:, bottom, right])
+        hits = inside.any(axis=2).T
+        
+        # Non-rectangular zones have no mask, test them exactly
+        if self._polygon_zones:
+            zones = list(self.zones.values())
+            for i in self._polygon_zones:
+                hits[:, i] = [zones[i].contains_bbox(bbox) for bbox in bboxes]
+        
+        return hits
+    
     def check_detections(self, detections: List[Dict]) -> Dict[str, List[Dict]]:
         """
         Check which zones contain detections
@@ -159,15 +260,19 @@ class ZoneMonitor:
             Dict mapping zone names to list of detections in that zone
         """
         zone_detections = {name: [] for name in self.zones}
+        if not detections:
+            return zone_detections
         
-        for detection in detections:
-            bbox = detection['bbox']
-            
-            for zone_name, zone in self.zones.items():
-                if zone.contains_bbox(bbox):
-                    zone_detections[zone_name].append(detection)
-                    zone.record_detection()
-                    self.total_detections += 1
+        zones = list(self.zones.items())
+        hits = self._zones_hit([detection['bbox'] for detection in detections])
+        
+        # nonzero() walks detections in order, then zones, like the nested loop did
+        for det_idx, zone_idx in zip(*np.nonzero(hits)):
+            zone_name, zone = zones[zone_idx]
+            if zone.enabled:
+                zone_detections[zone_name].append(detections[det_idx])
+                zone.record_detection()
+                self.total_detections += 1
         
         return zone_detections
     
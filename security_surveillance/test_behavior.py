@@ -1,9 +1,6 @@
 """
 Test behavioral pattern learning module
 """
-import sys
-sys.path.insert(0, '/workspaces/EdgeAI-IoT/security_surveillance')
-
 from modules.behavior import BehaviorLearner
 from datetime import datetime, timedelta
 import random
@@ -1,14 +1,13 @@
 """
 Test script for camera module (headless mode)
 """
-import sys
-sys.path.insert(0, '/workspaces/EdgeAI-IoT/security_surveillance')
-
 from modules.camera import CameraCapture
 import cv2
 import os
 import yaml
+from _fixtures import opencv_threads
 
+@opencv_threads(1, opencl=False)
 def test_camera():
     """Test camera capture and save sample frames"""
     print("Testing camera capture (headless mode)...")
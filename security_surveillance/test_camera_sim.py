@@ -1,12 +1,10 @@
 """
 Test camera module with simulated frames (for development without physical camera)
 """
-import sys
-sys.path.insert(0, '/workspaces/EdgeAI-IoT/security_surveillance')
-
 import cv2
 import numpy as np
 import os
+from _fixtures import opencv_threads
 
 def generate_test_frame(frame_num, width=640, height=480):
     """Generate a synthetic test frame with various patterns"""
@@ -35,6 +33,7 @@ def generate_test_frame(frame_num, width=640, height=480):
     
     return frame
 
+@opencv_threads(1, opencl=False)
 def test_camera_simulation():
     """Test camera module with simulated frames"""
     print("=" * 60)
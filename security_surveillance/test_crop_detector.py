@@ -5,8 +5,10 @@ import cv2
 import numpy as np
 from modules.crop_detector import CropDiseaseDetector
 import sys
+from _fixtures import opencv_threads
 
 
+@opencv_threads(1, opencl=False)
 def test_crop_detector():
     """Test the crop disease detector with a synthetic image"""
     
@@ -79,6 +81,7 @@ def test_crop_detector():
     return True
 
 
+@opencv_threads(1, opencl=False)
 def test_tflite_detector():
     """Test TFLite version of the detector (for Pi deployment)"""
     
@@ -1,11 +1,9 @@
 """
 Test event database module
 """
-import sys
-sys.path.insert(0, '/workspaces/EdgeAI-IoT/security_surveillance')
-
 from modules.database import EventDatabase
 from datetime import datetime, timedelta
+import sqlite3
 import os
 
 
@@ -125,6 +123,16 @@ def test_event_database():
     range_events = db.get_detections_by_timerange(start_time, end_time)
     print(f"   Events in last hour: {len(range_events)}")
     
+    db.close()
+    
+    # close() is final: no silent reopen after shutdown
+    try:
+        db.get_total_events()
+    except sqlite3.ProgrammingError:
+        print("   ✅ Closed database rejects further use")
+    else:
+        raise AssertionError("database was reopened after close()")
+    
     print("\n" + "=" * 70)
     print("EVENT DATABASE TEST: ✅ COMPLETE")
     print("=" * 70)
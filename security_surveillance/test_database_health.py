@@ -6,6 +6,13 @@ from datetime import datetime
 import os
 
 
+def _remove_db(db_path):
+    """Delete a test database together with its WAL and shared-memory files"""
+    for path in (db_path, db_path + '-wal', db_path + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+
+
 def test_health_database():
     """Test HealthDatabase functionality"""
     
@@ -15,8 +22,7 @@ def test_health_database():
     
     # Create test database
     test_db_path = 'data/test_output/test_health.db'
-    if os.path.exists(test_db_path):
-        os.remove(test_db_path)
+    _remove_db(test_db_path)
     
     print("\n1️⃣ Initializing HealthDatabase...")
     db = HealthDatabase(db_path=test_db_path)
@@ -110,6 +116,12 @@ def test_health_database():
     tomato_detections = db.get_recent_detections(limit=10, crop_type='Tomato')
     print(f"   Found {len(tomato_detections)} Tomato detections")
     
+    multi_detections = db.get_recent_detections(limit=10, crop_type=['Tomato', 'Potato'])
+    assert all(d['crop_type'] in ('Tomato', 'Potato') for d in multi_detections)
+    assert len(multi_detections) >= len(tomato_detections)
+    print(f"   Found {len(multi_detections)} Tomato/Potato detections")
+    assert db.get_recent_detections(limit=10, crop_type=[]) == []
+    
     print("\n8️⃣ Testing CSV export...")
     csv_path = 'data/test_output/health_export_test.csv'
     db.export_to_csv(csv_path)
@@ -119,6 +131,9 @@ def test_health_database():
     deleted = db.cleanup_old_records(days=365)  # Won't delete our test data
     print(f"   Cleanup completed: {deleted} records deleted")
     
+    db.close()
+    _remove_db(test_db_path)
+    
     print("\n" + "=" * 70)
     print("✅ All HealthDatabase tests passed!")
     print("=" * 70)
@@ -143,8 +158,7 @@ def test_health_database_integration():
     
     # Create database
     test_db_path = 'data/test_output/test_health_integration.db'
-    if os.path.exists(test_db_path):
-        os.remove(test_db_path)
+    _remove_db(test_db_path)
     
     print("\n2️⃣ Initializing HealthDatabase...")
     db = HealthDatabase(db_path=test_db_path)
@@ -163,6 +177,9 @@ def test_health_database_integration():
     print(f"   Total detections: {summary['total_detections']}")
     print(f"   Health rate: {summary['health_rate']:.1f}%")
     
+    db.close()
+    _remove_db(test_db_path)
+    
     print("\n" + "=" * 70)
     print("✅ Integration test passed!")
     print("=" * 70)
@@ -1,10 +1,12 @@
 """
 Test Health System
 Quick test with simulated camera feed
+Run with TEST_VERBOSE=1 for detailed progress output
 """
 import cv2
 import numpy as np
 from health_system import HealthSystem
+from _fixtures import vprint
 import time
 
 
@@ -31,7 +33,7 @@ def test_health_system_basic():
         }
     }
     
-    print("\n1️⃣ Initializing HealthSystem...")
+    vprint("\n1️⃣ Initializing HealthSystem...")
     system = HealthSystem.__new__(HealthSystem)
     system.config = config
     system.running = False
@@ -47,31 +49,31 @@ def test_health_system_basic():
     }
     system._init_components()
     
-    print("\n2️⃣ Testing detection on synthetic frames...")
+    vprint("\n2️⃣ Testing detection on synthetic frames...")
     
     # Test with 3 synthetic frames
     for i in range(3):
-        print(f"\n   Test {i+1}/3:")
+        vprint(f"\n   Test {i+1}/3:")
         test_frame = np.random.randint(0, 255, (640, 480, 3), dtype=np.uint8)
         system._process_detection(test_frame)
     
-    print("\n3️⃣ Getting system statistics...")
+    vprint("\n3️⃣ Getting system statistics...")
     stats = system.get_stats()
     
-    print(f"\n📊 Statistics:")
-    print(f"   Total detections: {stats['total_detections']}")
-    print(f"   Healthy count: {stats['healthy_count']}")
-    print(f"   Disease count: {stats['disease_count']}")
-    print(f"   Diseases detected: {len(stats['diseases_detected'])}")
-    print(f"   Crops monitored: {len(stats['crops_monitored'])}")
+    vprint(f"\n📊 Statistics:")
+    vprint(f"   Total detections: {stats['total_detections']}")
+    vprint(f"   Healthy count: {stats['healthy_count']}")
+    vprint(f"   Disease count: {stats['disease_count']}")
+    vprint(f"   Diseases detected: {len(stats['diseases_detected'])}")
+    vprint(f"   Crops monitored: {len(stats['crops_monitored'])}")
     
-    print("\n4️⃣ Testing latest detection retrieval...")
+    vprint("\n4️⃣ Testing latest detection retrieval...")
     latest = system.get_latest_detection()
     if latest:
         detection = latest['detection']
-        print(f"   Latest: {detection['crop_type']} - {detection['disease_name']}")
-        print(f"   Confidence: {detection['confidence']*100:.1f}%")
-        print(f"   Has recommendations: {len(detection['recommendations']) > 0}")
+        vprint(f"   Latest: {detection['crop_type']} - {detection['disease_name']}")
+        vprint(f"   Confidence: {detection['confidence']*100:.1f}%")
+        vprint(f"   Has recommendations: {len(detection['recommendations']) > 0}")
     
     # Cleanup (database auto-closes)
     
@@ -118,20 +120,22 @@ def test_health_system_overlay():
     # Create test frame
     test_frame = np.random.randint(0, 255, (640, 480, 3), dtype=np.uint8)
     
-    print("\n1️⃣ Running detection...")
+    vprint("\n1️⃣ Running detection...")
     system._process_detection(test_frame)
     
-    print("\n2️⃣ Testing overlay rendering...")
+    vprint("\n2️⃣ Testing overlay rendering...")
     overlay_frame = system._add_overlay(test_frame.copy())
     
-    print(f"   Original frame shape: {test_frame.shape}")
-    print(f"   Overlay frame shape: {overlay_frame.shape}")
-    print(f"   Overlay applied: {not np.array_equal(test_frame, overlay_frame)}")
+    vprint(f"   Original frame shape: {test_frame.shape}")
+    vprint(f"   Overlay frame shape: {overlay_frame.shape}")
+    # The overlay always darkens the top status banner, so a corner patch is enough
+    same = test_frame[:64, :64].tobytes() == overlay_frame[:64, :64].tobytes()
+    vprint(f"   Overlay applied: {not same}")
     
     # Save test image
     output_path = "data/test_output/health_system_overlay_test.jpg"
     cv2.imwrite(output_path, overlay_frame)
-    print(f"   Saved overlay test to: {output_path}")
+    vprint(f"   Saved overlay test to: {output_path}")
     
     # Cleanup (database auto-closes)
     
@@ -6,6 +6,9 @@ import requests
 import time
 import json
 
+# Reuse one keep-alive connection for all the API calls
+SESSION = requests.Session()
+
 
 def test_mode_switch():
     """Test mode switching API endpoints"""
@@ -18,7 +21,7 @@ def test_mode_switch():
     try:
         # Test 1: Get current mode
         print("\n1️⃣  Testing GET /api/mode...")
-        response = requests.get(f"{base_url}/mode")
+        response = SESSION.get(f"{base_url}/mode")
         if response.status_code == 200:
             data = response.json()
             print(f"   ✅ Current mode: {data['mode']}")
@@ -32,7 +35,7 @@ def test_mode_switch():
         
         # Test 2: Switch mode
         print(f"\n2️⃣  Testing POST /api/switch_mode (to {target_mode})...")
-        response = requests.post(
+        response = SESSION.post(
             f"{base_url}/switch_mode",
             json={"mode": target_mode}
         )
@@ -52,7 +55,7 @@ def test_mode_switch():
         # Test 3: Verify mode changed
         print("\n3️⃣  Verifying mode change...")
         time.sleep(1)
-        response = requests.get(f"{base_url}/mode")
+        response = SESSION.get(f"{base_url}/mode")
         if response.status_code == 200:
             data = response.json()
             if data['mode'] == target_mode:
@@ -63,7 +66,7 @@ def test_mode_switch():
         
         # Test 4: Test invalid mode
         print("\n4️⃣  Testing invalid mode...")
-        response = requests.post(
+        response = SESSION.post(
             f"{base_url}/switch_mode",
             json={"mode": "invalid_mode"}
         )
@@ -77,7 +80,7 @@ def test_mode_switch():
         
         # Test 5: Get health stats (if in health mode)
         print("\n5️⃣  Testing health stats endpoint...")
-        response = requests.get(f"{base_url}/agriculture/health/stats")
+        response = SESSION.get(f"{base_url}/agriculture/health/stats")
         if response.status_code == 200:
             data = response.json()
             if 'error' in data:
@@ -1,45 +1,56 @@
 """
 Test motion detection module
 """
-import sys
-sys.path.insert(0, '/workspaces/EdgeAI-IoT/security_surveillance')
-
 from modules.motion import MotionDetector, SmartMotionFilter
 import cv2
 import numpy as np
 import os
-import time
+import timeit
+import statistics
+from _fixtures import ImageWriter, opencv_threads, rasterize_sprite
+
+
+def _build_walker_sprite():
+    """Rasterize the moving "person" (body + head) once, anchored at its body corner"""
+    # Body is 60x120 at (0, 55); head circle centred 30px above the body
+    sprite, mask = rasterize_sprite([
+        ('rect', (0, 55), (60, 175), (180, 150, 120)),   # Body
+        ('circle', (30, 25), 25, (220, 180, 140)),       # Head
+    ], 176, 61)
+    return sprite, mask[..., None]
 
 
 def create_frames_with_motion(num_frames: int = 30) -> list:
     """Create sequence of frames with simulated motion"""
-    frames = []
     width, height = 640, 480
     
-    for i in range(num_frames):
-        # Create static background
-        frame = np.zeros((height, width, 3), dtype=np.uint8)
-        frame[:] = (120, 140, 160)  # Gray background
-        
-        # Add some static elements
-        cv2.rectangle(frame, (50, 50), (150, 150), (80, 100, 120), -1)
-        cv2.rectangle(frame, (500, 300), (600, 400), (100, 120, 140), -1)
-        
+    # Create static background once
+    background = np.full((height, width, 3), (120, 140, 160), dtype=np.uint8)  # Gray background
+    
+    # Add some static elements
+    cv2.rectangle(background, (50, 50), (150, 150), (80, 100, 120), -1)
+    cv2.rectangle(background, (500, 300), (600, 400), (100, 120, 140), -1)
+    
+    sprite, mask = _build_walker_sprite()
+    sprite_h, sprite_w = mask.shape[:2]
+    
+    # All frames share one allocation, filled with the background in a single copy
+    frames = np.repeat(background[None], num_frames, axis=0)
+    
+    for i, frame in enumerate(frames):
         # Add moving object (simulates person walking)
         if i > 10:  # Motion starts after frame 10
             x_pos = 200 + (i - 10) * 15  # Moving right
             y_pos = 250
             
-            # Draw moving "person"
-            cv2.rectangle(frame, (x_pos, y_pos), (x_pos + 60, y_pos + 120), 
-                         (180, 150, 120), -1)
-            cv2.circle(frame, (x_pos + 30, y_pos - 30), 25, (220, 180, 140), -1)
-        
-        frames.append(frame)
+            # Blit moving "person" (sprite top sits 55px above the body)
+            roi = frame[y_pos - 55:y_pos - 55 + sprite_h, x_pos:x_pos + sprite_w]
+            np.copyto(roi, sprite, where=mask)
     
-    return frames
+    return list(frames)
 
 
+@opencv_threads(1, opencl=False)
 def test_motion_detection():
     """Test motion detection pipeline"""
     print("=" * 70)
@@ -70,9 +81,14 @@ def test_motion_detection():
     print("\n4️⃣ Processing frames for motion detection...")
     motion_detected_frames = []
     total_motion_boxes = 0
+    image_writer = ImageWriter()
+    
+    # Keep per-frame results so the smart filter test can replay them
+    motion_results = []
     
     for i, frame in enumerate(frames):
         has_motion, boxes = detector.detect(frame)
+        motion_results.append((has_motion, boxes))
         
         if has_motion:
             motion_detected_frames.append(i)
@@ -81,7 +97,9 @@ def test_motion_detection():
             # Annotate and save some frames
             if i % 5 == 0 or i == len(frames) - 1:
                 annotated = detector.draw_motion(frame, boxes)
-                cv2.imwrite(f'data/test_output/motion_frame_{i:03d}.jpg', annotated)
+                image_writer.put(f'data/test_output/motion_frame_{i:03d}.jpg', annotated)
+    
+    image_writer.close()
     
     print(f"\n   📊 Motion Detection Results:")
     print(f"   - Frames with motion: {len(motion_detected_frames)}/{len(frames)}")
@@ -109,8 +127,7 @@ def test_motion_detection():
     )
     
     detection_triggers = 0
-    for i, frame in enumerate(frames):
-        has_motion, boxes = detector.detect(frame)
+    for i, (has_motion, boxes) in enumerate(motion_results):
         should_detect = smart_filter.should_run_detection(has_motion, boxes)
         
         if should_detect:
@@ -125,19 +142,24 @@ def test_motion_detection():
     # Benchmark performance
     print("\n6️⃣ Benchmarking motion detection speed...")
     test_frame = frames[0]
-    start = time.time()
-    iterations = 100
+    number, repeat = 20, 5
+    
+    # Reuse the intermediate buffers so the loop measures detection, not allocation
+    blur_buf = np.empty(test_frame.shape[:2], dtype=np.uint8)
+    mask_buf = np.empty_like(blur_buf)
     
-    for _ in range(iterations):
-        detector.detect(test_frame)
+    # timeit switches GC off while timing; one untimed batch warms up first
+    timer = timeit.Timer(lambda: detector.detect(test_frame, blur_out=blur_buf, mask_out=mask_buf))
+    timer.timeit(number=5)
+    samples = [t / number * 1000 for t in timer.repeat(number=number, repeat=repeat)]
     
-    elapsed = time.time() - start
-    fps = iterations / elapsed
-    avg_ms = (elapsed / iterations) * 1000
+    best_ms = min(samples)
+    median_ms = statistics.median(samples)
     
-    print(f"\n   ⚡ Performance (100 runs):")
-    print(f"   - Average time: {avg_ms:.1f} ms")
-    print(f"   - Estimated FPS: {fps:.1f}")
+    print(f"\n   ⚡ Performance ({repeat} x {number} runs):")
+    print(f"   - Best average time: {best_ms:.1f} ms")
+    print(f"   - Median average time: {median_ms:.1f} ms")
+    print(f"   - Estimated FPS: {1000 / median_ms:.1f}")
     print(f"   - Pi 3 expected: ~15-30 FPS (very lightweight)")
     
     print("\n" + "=" * 70)
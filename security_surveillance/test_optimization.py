@@ -2,53 +2,71 @@
 Test integrated performance optimizations
 Shows threaded camera, motion detection, frame skipping, and throttling
 """
-import sys
-sys.path.insert(0, '/workspaces/EdgeAI-IoT/security_surveillance')
-
 from modules.camera import CameraCapture
 from modules.motion import MotionDetector, SmartMotionFilter
 from modules.detector import PersonDetector
 from modules.performance import ThreadedCamera, FrameSkipper, InferenceThrottler, PerformanceMonitor
+from _fixtures import ImageWriter
 import cv2
 import numpy as np
 import time
 import os
+import functools
+import threading
+
+# Filled radius-25 disk for the simulated person's head (matches cv2.circle)
+_yy, _xx = np.ogrid[-25:26, -25:26]
+HEAD_DISK = (_yy * _yy + _xx * _xx) <= 25 * 25
 
 
 class SimulatedCamera:
     """Simulated camera for testing"""
     
-    def __init__(self, width=640, height=480):
+    def __init__(self, width=640, height=480, latency=0.033, tick=None):
+        """
+        Args:
+            width, height: Frame size
+            latency: Seconds to sleep per frame (0 = as fast as possible)
+            tick: Optional threading.Semaphore; each frame then waits for
+                one release() instead of sleeping
+        """
         self.width = width
         self.height = height
+        self.latency = latency
+        self.tick = tick
         self.frame_count = 0
         
+        # Static background, rendered once
+        self._bg = np.full((self.height, self.width, 3), (120, 140, 160), dtype=np.uint8)
+        cv2.rectangle(self._bg, (50, 50), (150, 150), (80, 100, 120), -1)
+    
     def start(self):
         return True
     
     def read_frame(self):
         """Generate simulated frame with occasional motion"""
-        self.frame_count += 1
+        # Paced by the caller: no tick yet reads as a (retried) capture miss
+        if self.tick is not None and not self.tick.acquire(timeout=0.1):
+            return False, None
         
-        # Create background
-        frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
-        frame[:] = (120, 140, 160)
+        self.frame_count += 1
         
-        # Add static elements
-        cv2.rectangle(frame, (50, 50), (150, 150), (80, 100, 120), -1)
+        # Fresh copy per frame: ThreadedCamera buffers frames, so they can't share memory
+        frame = self._bg.copy()
         
         # Add moving person every 20-40 frames
         if self.frame_count % 30 < 10:
             x_pos = 200 + (self.frame_count % 10) * 30
             y_pos = 250
             
-            # Person silhouette
-            cv2.rectangle(frame, (x_pos, y_pos), (x_pos + 60, y_pos + 120), 
-                         (180, 150, 120), -1)
-            cv2.circle(frame, (x_pos + 30, y_pos - 30), 25, (220, 180, 140), -1)
+            # Person silhouette (slice fills, inclusive bounds like cv2.rectangle)
+            frame[y_pos:y_pos + 121, x_pos:x_pos + 61] = (180, 150, 120)
+            cx, cy = x_pos + 30, y_pos - 30
+            frame[cy - 25:cy + 26, cx - 25:cx + 26][HEAD_DISK] = (220, 180, 140)
         
-        # Simulate camera latency
-        time.sleep(0.033)  # ~30 FPS camera
+        # Simulate camera latency (~30 FPS camera), 0 = as fast as possible
+        if self.latency:
+            time.sleep(self.latency)
         
         return True, frame
     
@@ -56,8 +74,30 @@ class SimulatedCamera:
         pass
 
 
-def test_performance_optimization():
-    """Test full optimization pipeline"""
+@functools.lru_cache(maxsize=1)
+def _get_person_detector():
+    """Load YOLOv8n once per process and warm it up"""
+    print("   Loading YOLOv8n model...")
+    detector = PersonDetector(
+        model_path='data/models/yolov8n.pt',
+        conf_threshold=0.5,
+        input_size=416
+    )
+    detector.load_model()
+    
+    # Warm-up inference so the first timed run reflects steady state
+    detector.detect_persons(np.zeros((480, 640, 3), dtype=np.uint8), draw_boxes=False)
+    return detector
+
+
+def test_performance_optimization(num_frames=300, frame_interval=0.033):
+    """
+    Test full optimization pipeline
+    
+    Runs a fixed number of frames against a synthetic clock that advances
+    frame_interval seconds per frame, so throttling and cooldowns are
+    reproducible and the test doesn't wait on wall-clock time.
+    """
     print("=" * 70)
     print("PERFORMANCE OPTIMIZATION TEST")
     print("=" * 70)
@@ -67,71 +107,100 @@ def test_performance_optimization():
     # Initialize components
     print("\n1️⃣ Initializing components...")
     
-    # Simulated camera
-    sim_camera = SimulatedCamera(width=640, height=480)
+    # Person detection (cached across runs, loaded outside the timed loop)
+    person_detector = _get_person_detector()
+    
+    # Synthetic clock: simulated seconds since the loop started
+    frame_idx = 0
+    
+    def sim_time():
+        return frame_idx * frame_interval
+    
+    # Simulated camera paced by the synthetic clock: the loop releases one
+    # tick per frame, so the capture thread renders exactly one frame per
+    # tick instead of spinning against the timed stages
+    frame_tick = threading.Semaphore(0)
+    sim_camera = SimulatedCamera(width=640, height=480, latency=0, tick=frame_tick)
     sim_camera.start()
     
-    # Threaded camera capture
-    threaded_cam = ThreadedCamera(sim_camera, buffer_size=2)
+    # Threaded camera capture. The buffer holds the whole calibration batch;
+    # the main loop takes each ticked frame at once, so it never fills up
+    calibration_count = 10
+    threaded_cam = ThreadedCamera(sim_camera, buffer_size=calibration_count)
     threaded_cam.start()
-    time.sleep(0.5)  # Let buffer fill
+    frame_source = threaded_cam.read_iter()
+    
+    def next_frame():
+        """Advance the camera by one tick and take the frame it produces"""
+        frame_tick.release()
+        return next(frame_source, None)
     
     # Motion detection
     motion_detector = MotionDetector(sensitivity=0.015, min_area=500)
-    smart_filter = SmartMotionFilter(cooldown_seconds=2, min_motion_frames=2)
-    
-    # Person detection (lazy load)
-    person_detector = None
+    smart_filter = SmartMotionFilter(cooldown_seconds=2, min_motion_frames=2,
+                                     time_fn=sim_time)
     
     # Optimization modules
     frame_skipper = FrameSkipper(skip_frames=2)  # Process every 3rd frame
-    inference_throttler = InferenceThrottler(target_fps=1.0)  # Max 1 inference/sec
+    inference_throttler = InferenceThrottler(target_fps=1.0,  # Max 1 inference/sec
+                                             time_fn=sim_time)
     perf_monitor = PerformanceMonitor(window_size=50)
     
     print("   ✅ All components initialized")
     
     # Run processing loop
     print("\n2️⃣ Running optimized processing pipeline...")
-    print("   Target: 30 seconds runtime")
+    print(f"   Target: {num_frames} frames ({num_frames * frame_interval:.0f}s simulated)")
     
-    start_time = time.time()
-    runtime_target = 30  # seconds
+    start_time = time.perf_counter()
+    runtime_target = num_frames * frame_interval  # simulated seconds
     motion_triggers = 0
     inference_runs = 0
     frames_processed = 0
     
     # Calibrate motion detector
     print("\n   Calibrating motion detector...")
-    calibration_frames = []
-    for _ in range(10):
-        frame = threaded_cam.read()
-        if frame is not None:
-            calibration_frames.append(frame)
+    # Tick out the whole batch up front and drain it in one read
+    frame_tick.release(calibration_count)
+    calibration_frames = threaded_cam.read_batch(calibration_count)
     motion_detector.calibrate(calibration_frames)
     
     print("   Starting main loop...\n")
     
-    while time.time() - start_time < runtime_target:
-        loop_start = time.time()
+    # Detection snapshots are saved off the timed path
+    image_writer = ImageWriter()
+    
+    # Progress every 5 simulated seconds, checked with a single compare per frame
+    print_every = int(5 / frame_interval)
+    next_print = 0
+    
+    for frame_idx in range(num_frames):
+        loop_start = time.perf_counter()
         
         # 1. Capture frame (threaded, non-blocking)
-        capture_start = time.time()
-        frame = threaded_cam.read()
+        capture_start = time.perf_counter()
+        frame = next_frame()
         if frame is None:
-            continue
-        capture_time = (time.time() - capture_start) * 1000
+            break
+        capture_time = (time.perf_counter() - capture_start) * 1000
         perf_monitor.record_capture(capture_time)
         
         frames_processed += 1
         
+        # Progress update every 5 simulated seconds
+        if frame_idx >= next_print:
+            print(f"   [{sim_time():.0f}s] Processed {frames_processed} frames, "
+                  f"{motion_triggers} motion triggers, {inference_runs} inferences")
+            next_print = frame_idx + print_every
+        
         # 2. Frame skipping optimization
         if not frame_skipper.should_process():
             continue
         
         # 3. Motion detection (always run - it's fast)
-        motion_start = time.time()
+        motion_start = time.perf_counter()
         has_motion, motion_boxes = motion_detector.detect(frame)
-        motion_time = (time.time() - motion_start) * 1000
+        motion_time = (time.perf_counter() - motion_start) * 1000
         perf_monitor.record_motion(motion_time)
         
         # 4. Smart motion filtering
@@ -142,42 +211,27 @@ def test_performance_optimization():
             
             # 5. Inference throttling
             if inference_throttler.should_infer():
-                # Lazy load person detector
-                if person_detector is None:
-                    print("   Loading YOLOv8n model (first detection)...")
-                    person_detector = PersonDetector(
-                        model_path='data/models/yolov8n.pt',
-                        conf_threshold=0.5,
-                        input_size=416
-                    )
-                    person_detector.load_model()
-                
                 # Run person detection
-                inference_start = time.time()
+                inference_start = time.perf_counter()
                 detections, annotated = person_detector.detect_persons(frame, draw_boxes=True)
-                inference_time = (time.time() - inference_start) * 1000
+                inference_time = (time.perf_counter() - inference_start) * 1000
                 perf_monitor.record_inference(inference_time)
                 inference_runs += 1
                 
                 if detections:
-                    print(f"   🚨 [{time.time()-start_time:.1f}s] Detected {len(detections)} person(s)")
+                    print(f"   🚨 [{sim_time():.1f}s] Detected {len(detections)} person(s)")
                     
                     # Save detection frame
                     output_path = f'data/test_output/optimized_detection_{inference_runs:03d}.jpg'
-                    cv2.imwrite(output_path, annotated)
+                    image_writer.put(output_path, annotated)
         
         # Record total time
-        total_time = (time.time() - loop_start) * 1000
+        total_time = (time.perf_counter() - loop_start) * 1000
         perf_monitor.record_total(total_time)
-        
-        # Progress update every 5 seconds
-        elapsed = time.time() - start_time
-        if int(elapsed) % 5 == 0 and frames_processed % 10 == 0:
-            print(f"   [{elapsed:.0f}s] Processed {frames_processed} frames, "
-                  f"{motion_triggers} motion triggers, {inference_runs} inferences")
     
-    # Stop threaded camera
+    # Stop threaded camera and flush pending snapshots
     threaded_cam.stop()
+    image_writer.close()
     
     print("\n" + "=" * 70)
     print("OPTIMIZATION TEST: ✅ COMPLETE")
@@ -185,7 +239,8 @@ def test_performance_optimization():
     
     # Display comprehensive results
     print("\n📊 Processing Statistics:")
-    print(f"   Runtime: {runtime_target} seconds")
+    print(f"   Runtime: {runtime_target:.1f} seconds simulated, "
+          f"{time.perf_counter() - start_time:.1f} seconds wall clock")
     print(f"   Frames captured: {frames_processed}")
     print(f"   Frames processed: {frame_skipper.get_stats()['processed']}")
     print(f"   Motion triggers: {motion_triggers}")
@@ -205,6 +260,9 @@ def test_performance_optimization():
     print(f"   Frames dropped: {cam_stats['frames_dropped']}")
     print(f"   Drop rate: {cam_stats['drop_rate']:.1%}")
     
+    # One frame per clock tick: nothing should pile up in the buffer
+    assert cam_stats['frames_dropped'] == 0
+    
     # Performance report
     perf_monitor.print_report()
     
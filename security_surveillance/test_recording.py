@@ -1,42 +1,96 @@
 """
 Test video recording and storage management
 """
-import sys
-sys.path.insert(0, '/workspaces/EdgeAI-IoT/security_surveillance')
-
 from modules.recorder import VideoRecorder, StorageManager
 import cv2
 import numpy as np
 import time
 import os
+import shutil
+import subprocess
+import tempfile
+from _fixtures import Clock, cached_frame, opencv_threads
+
+
+def _draw_person(img):
+    """Draw the person silhouette and banner (in place)"""
+    height, width = img.shape[:2]
+    person_x, person_y = width // 2, height // 2
+    cv2.circle(img, (person_x, person_y - 80), 40, (220, 180, 140), -1)
+    cv2.rectangle(img, (person_x - 50, person_y - 40),
+                 (person_x + 50, person_y + 80), (180, 150, 120), -1)
+    cv2.putText(img, "PERSON DETECTED", (width//2 - 150, height - 30),
+               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
+
+
+# Rows covered by the frame number and timestamp text
+_TEXT_BAND = 80
+
+
+def _text_line(label, org, scale, color, thickness=2):
+    """
+    Describe a "label value" text line whose label is drawn once
+    
+    Returns:
+        (label, org, scale, color, thickness, value_x) where value_x is the
+        x position at which putText would have continued after the label
+    """
+    args = (cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+    advance = cv2.getTextSize(label + "0", *args)[0][0] - cv2.getTextSize("0", *args)[0][0]
+    return label, org, scale, color, thickness, org[0] + advance
+
+
+_FRAME_LINE = _text_line("Frame ", (10, 30), 1, (255, 255, 255))
+_TIME_LINE = _text_line("Time: ", (10, 70), 0.7, (200, 200, 200))
+
+
+def _put_label(img, line):
+    """Draw the constant label of a text line"""
+    label, org, scale, color, thickness, _ = line
+    cv2.putText(img, label, org, cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+
+
+def _put_value(img, line, value):
+    """Draw the per-frame value right after the line's label"""
+    _, (_, y), scale, color, thickness, value_x = line
+    cv2.putText(img, value, (value_x, y), cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+
+
+def _person_clears_text(height):
+    """Whether the person and banner stay below the text lines at this height"""
+    return height // 2 - 120 >= _TEXT_BAND and height - 60 >= _TEXT_BAND
+
+
+@cached_frame
+def _build_scene(width, height, has_person):
+    """Static part of a test frame (background, text labels, optional person)"""
+    img = np.full((height, width, 3), (120, 140, 160), dtype=np.uint8)
+    _put_label(img, _FRAME_LINE)
+    _put_label(img, _TIME_LINE)
+    if has_person:
+        _draw_person(img)
+    return img
 
 
 def create_test_frame(width=640, height=480, frame_num=0, has_person=False):
     """Create a test frame with frame number and optional person"""
-    # Create background
-    img = np.zeros((height, width, 3), dtype=np.uint8)
-    img[:] = (120, 140, 160)
-    
-    # Add frame number
-    cv2.putText(img, f"Frame {frame_num}", (10, 30),
-               cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    # The person can only be cached into the scene if the text drawn
+    # below doesn't overlap it; otherwise draw it last as before
+    bake_person = has_person and _person_clears_text(height)
+    img = _build_scene(width, height, bake_person).copy()
     
-    # Add timestamp
-    cv2.putText(img, f"Time: {time.time():.2f}", (10, 70),
-               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
+    # Add frame number and timestamp (labels come from the cached scene)
+    _put_value(img, _FRAME_LINE, str(frame_num))
+    _put_value(img, _TIME_LINE, f"{time.time():.2f}")
     
     # Add person if requested
-    if has_person:
-        person_x, person_y = width // 2, height // 2
-        cv2.circle(img, (person_x, person_y - 80), 40, (220, 180, 140), -1)
-        cv2.rectangle(img, (person_x - 50, person_y - 40),
-                     (person_x + 50, person_y + 80), (180, 150, 120), -1)
-        cv2.putText(img, "PERSON DETECTED", (width//2 - 150, height - 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
+    if has_person and not bake_person:
+        _draw_person(img)
     
     return img
 
 
+@opencv_threads()
 def test_recording_module():
     """Test the video recording module"""
     print("=" * 70)
@@ -45,12 +99,14 @@ def test_recording_module():
     
     # Initialize recorder
     print("\n1️⃣ Initializing VideoRecorder...")
+    clock = Clock(start=time.time())
     recorder = VideoRecorder(
         output_dir='data/recordings',
         pre_buffer_seconds=2,
         post_buffer_seconds=3,
         fps=10,
-        resolution=(640, 480)
+        resolution=(640, 480),
+        time_fn=clock
     )
     
     # Simulate continuous frame capture
@@ -64,10 +120,14 @@ def test_recording_module():
         frame = create_test_frame(frame_num=frame_num, has_person=False)
         recorder.add_frame(frame)
         frame_num += 1
-        time.sleep(0.05)  # Simulate 20 FPS capture
+        clock.advance(0.05)  # Simulate 20 FPS capture
     
     print(f"   ✅ Buffered {frame_num} frames")
     
+    # The pre-buffer is one preallocated ring sized fps * pre_buffer_seconds
+    assert recorder._ring.nbytes == recorder.buffer_size * 480 * 640 * 3
+    assert recorder.get_status()['buffer_size'] == recorder.buffer_size
+    
     # Phase 2: Detection event triggers recording
     print("\n3️⃣ Detection event - Starting recording...")
     filename = recorder.start_recording(
@@ -92,7 +152,7 @@ def test_recording_module():
             detection_frames += 1
         
         frame_num += 1
-        time.sleep(0.05)
+        clock.advance(0.05)
         
         # Show status every 10 frames
         if i % 10 == 0:
@@ -110,7 +170,7 @@ def test_recording_module():
         
         still_recording = recorder.update_recording(frame, has_detection=False)
         frame_num += 1
-        time.sleep(0.05)
+        clock.advance(0.05)
         
         if not still_recording:
             print(f"   ✅ Recording stopped automatically after post-buffer")
@@ -138,6 +198,94 @@ def test_recording_module():
     return True
 
 
+# Hardware H.264 encoders first (NVIDIA, then Pi V4L2 M2M), CPU x264 last
+FFMPEG_ENCODERS = [
+    ('h264_nvenc', ['-preset', 'p5', '-tune', 'll']),
+    ('h264_v4l2m2m', []),
+    ('libx264', ['-preset', 'veryfast', '-tune', 'zerolatency']),
+]
+
+
+def _probe_ffmpeg_encoder(ffmpeg):
+    """Return the first encoder that can actually encode on this machine"""
+    for name, options in FFMPEG_ENCODERS:
+        result = subprocess.run(
+            [ffmpeg, '-hide_banner', '-loglevel', 'error',
+             '-f', 'lavfi', '-i', 'color=size=640x480:rate=10:duration=0.2',
+             '-c:v', name, *options, '-f', 'null', '-'],
+            capture_output=True, timeout=30
+        )
+        if result.returncode == 0:
+            return name, options
+    return None, None
+
+
+def test_ffmpeg_encoding(num_frames=60, width=640, height=480, fps=10):
+    """Benchmark piping raw frames to an ffmpeg H.264 encoder"""
+    print("\n" + "=" * 70)
+    print("FFMPEG ENCODER TEST")
+    print("=" * 70)
+    
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        print("   ⚠️ ffmpeg not found - skipping encoder test")
+        return True
+    
+    print("\n1️⃣ Probing H.264 encoders...")
+    encoder, options = _probe_ffmpeg_encoder(ffmpeg)
+    if encoder is None:
+        print("   ⚠️ No usable H.264 encoder - skipping encoder test")
+        return True
+    print(f"   ✅ Using {encoder}")
+    
+    # Render the frames up front so only the encode is timed
+    frames = [create_test_frame(width, height, frame_num=i, has_person=(i % 5 < 3))
+              for i in range(num_frames)]
+    
+    print(f"\n2️⃣ Encoding {num_frames} frames...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_path = os.path.join(tmp_dir, 'encode_test.mp4')
+        proc = subprocess.Popen(
+            [ffmpeg, '-hide_banner', '-loglevel', 'error', '-y',
+             '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{width}x{height}',
+             '-r', str(fps), '-i', 'pipe:',
+             '-c:v', encoder, *options, '-b:v', '2M', '-pix_fmt', 'yuv420p', out_path],
+            stdin=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        
+        # An encoder can pass the probe and still fail here; ffmpeg must be
+        # gone before the temporary directory is removed
+        start = time.perf_counter()
+        try:
+            try:
+                for frame in frames:
+                    proc.stdin.write(frame.tobytes())
+            except BrokenPipeError:
+                pass  # ffmpeg exited early, its stderr says why
+            _, stderr = proc.communicate(timeout=60)
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+        elapsed = time.perf_counter() - start
+        
+        assert proc.returncode == 0, (
+            f"ffmpeg exited with {proc.returncode}: "
+            f"{stderr.decode(errors='replace').strip()}")
+        file_size = os.path.getsize(out_path) / 1024
+    
+    encode_fps = num_frames / elapsed
+    print(f"   ✅ Encoded in {elapsed:.2f}s ({encode_fps:.1f} FPS), {file_size:.1f} KB")
+    if encode_fps < 30:
+        print("   ⚠️ Below 30 FPS real-time target")
+    
+    print("\n" + "=" * 70)
+    print("FFMPEG ENCODER TEST: ✅ COMPLETE")
+    print("=" * 70)
+    
+    return True
+
+
 def test_storage_management():
     """Test storage management and cleanup"""
     print("\n" + "=" * 70)
@@ -154,10 +302,17 @@ def test_storage_management():
     
     # Check current usage
     print("\n2️⃣ Checking current storage usage...")
+    start = time.perf_counter()
     usage = storage.get_storage_usage()
+    scan_ms = (time.perf_counter() - start) * 1000
     print(f"   Current usage: {usage['total_mb']:.2f} MB")
     print(f"   Files: {usage['file_count']}")
     print(f"   Max allowed: {usage['max_mb']:.2f} MB")
+    print(f"   Scan time: {scan_ms:.2f} ms")
+    assert scan_ms < 500, f"Storage scan too slow: {scan_ms:.1f} ms"
+    
+    # Repeat calls inside the cache window return the same figures
+    assert storage.get_storage_usage() == usage
     
     # Check if cleanup needed
     print("\n3️⃣ Checking if cleanup needed...")
@@ -185,6 +340,9 @@ if __name__ == "__main__":
     # Test recording
     test_recording_module()
     
+    # Test ffmpeg H.264 encoding
+    test_ffmpeg_encoding()
+    
     # Test storage management
     test_storage_management()
     
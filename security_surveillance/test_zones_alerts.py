@@ -1,20 +1,18 @@
 """
 Test zone detection and alert system
 """
-import sys
-sys.path.insert(0, '/workspaces/EdgeAI-IoT/security_surveillance')
-
 from modules.zones import Zone, ZoneMonitor, create_zones_from_config
 from modules.alerts import AlertSystem, AlertLevel, ZoneAlertManager
 import cv2
 import numpy as np
 import os
+from _fixtures import ImageWriter, cached_frame, opencv_threads
 
 
-def create_test_frame_with_zones(width=640, height=480):
-    """Create frame with visible zones"""
-    frame = np.zeros((height, width, 3), dtype=np.uint8)
-    frame[:] = (120, 140, 160)
+@cached_frame
+def _build_zones_background(width, height):
+    """Background scene for the zone tests"""
+    frame = np.full((height, width, 3), (120, 140, 160), dtype=np.uint8)
     
     # Add background elements
     cv2.rectangle(frame, (50, 50), (150, 150), (80, 100, 120), -1)
@@ -23,6 +21,12 @@ def create_test_frame_with_zones(width=640, height=480):
     return frame
 
 
+def create_test_frame_with_zones(width=640, height=480):
+    """Create frame with visible zones"""
+    return _build_zones_background(width, height).copy()
+
+
+@opencv_threads(1, opencl=False)
 def test_zones_and_alerts():
     """Test zone detection and alert system"""
     print("=" * 70)
@@ -88,9 +92,12 @@ def test_zones_and_alerts():
     print("\n3️⃣ Creating test frame...")
     frame = create_test_frame_with_zones()
     
+    # Visualizations are encoded inline and written to disk in the background
+    image_writer = ImageWriter()
+    
     # Draw zones
     frame_with_zones = zone_monitor.draw_zones(frame.copy())
-    cv2.imwrite('data/test_output/zones_visualization.jpg', frame_with_zones)
+    image_writer.put('data/test_output/zones_visualization.jpg', frame_with_zones)
     print("   ✅ Zones visualization saved: data/test_output/zones_visualization.jpg")
     
     # Test detections in different zones
@@ -130,6 +137,9 @@ def test_zones_and_alerts():
         }
     ]
     
+    # put() encodes immediately, so one visualization buffer is reused per case
+    vis_frame = np.empty_like(frame_with_zones)
+    
     for i, test_case in enumerate(test_cases, 1):
         print(f"\n   Test {i}: {test_case['name']}")
         
@@ -148,8 +158,7 @@ def test_zones_and_alerts():
             print("      No zones triggered")
         
         # Visualize
-        vis_frame = frame.copy()
-        vis_frame = zone_monitor.draw_zones(vis_frame)
+        np.copyto(vis_frame, frame_with_zones)
         
         # Draw detections
         for det in test_case['detections']:
@@ -159,7 +168,9 @@ def test_zones_and_alerts():
             cv2.putText(vis_frame, label, (x, y - 10),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 2)
         
-        cv2.imwrite(f'data/test_output/zone_test_{i}.jpg', vis_frame)
+        image_writer.put(f'data/test_output/zone_test_{i}.jpg', vis_frame)
+    
+    image_writer.close()
     
     # Test cooldown
     print("\n5️⃣ Testing alert cooldown...")
@@ -216,5 +227,41 @@ def test_zones_and_alerts():
     return True
 
 
+@opencv_threads(1, opencl=False)
+def test_zone_lookup_matches_polygon_test():
+    """ZoneMonitor must agree with Zone.contains_bbox, slanted zones included"""
+    zones = [
+        Zone("rect", [(250, 0), (390, 0), (390, 200), (250, 200)]),
+        Zone("quad", [(100, 120), (400, 60), (520, 380), (60, 300)]),
+        Zone("triangle", [(300, 300), (600, 250), (450, 470)]),
+    ]
+    zone_monitor = ZoneMonitor(zones)
+    
+    rng = np.random.default_rng(0)
+    xy = rng.integers(-50, [640, 480], size=(5000, 2))
+    wh = rng.integers(0, [200, 250], size=(5000, 2))
+    detections = [{'bbox': tuple(int(v) for v in box)} for box in np.hstack([xy, wh])]
+    
+    # Detector bboxes are float32; fractions of a pixel near a zone edge
+    # must not snap onto it
+    fractions = rng.choice([0.0, 0.2, 0.5, 0.7], size=(5000, 4))
+    float_boxes = (np.hstack([xy, wh]) + fractions).astype(np.float32)
+    detections += [{'bbox': box} for box in float_boxes]
+    detections += [{'bbox': (390.5, 50.0, 10.0, 10.0)},
+                   {'bbox': (249.5, 199.5, 0.0, 0.0)},
+                   {'bbox': np.float32([390.7, 20.2, 140, 60])}]
+    
+    zone_detections = zone_monitor.check_detections(detections)
+    for zone in zones:
+        expected = [i for i, det in enumerate(detections) if zone.contains_bbox(det['bbox'])]
+        index = {id(det): i for i, det in enumerate(detections)}
+        found = [index[id(det)] for det in zone_detections[zone.name]]
+        assert found == expected, zone.name
+    
+    print("✅ Zone lookup matches Zone.contains_bbox")
+    return True
+
+
 if __name__ == "__main__":
     test_zones_and_alerts()
+    test_zone_lookup_matches_polygon_test()